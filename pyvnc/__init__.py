@@ -47,13 +47,9 @@ Quick Start::
 
     asyncio.run(main())
 
-Relative Coordinates:
-    pyvnc provides a resolution-independent coordinate system:
-    - Automatically scales to maintain aspect ratio close to actual screen
-    - Both width and height are multiples of 100 (easy mental math)
-    - Maximum dimensions are 99900 (for any aspect ratio)
-    - Use relative=True parameter in mouse/capture methods
-    - Get dimensions with vnc.get_relative_resolution()
+Coordinates:
+    All points and rectangles are in absolute framebuffer pixels; the
+    screen size is available as vnc.rect.
 
 Mouse Button Constants:
     Use these constants instead of raw numbers:
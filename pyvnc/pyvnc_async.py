@@ -9,10 +9,13 @@ from __future__ import annotations
 
 import asyncio
 from contextlib import asynccontextmanager, AsyncExitStack
+from dataclasses import dataclass, field
+from functools import lru_cache
 import logging
 from secrets import token_bytes
-from typing import Any, Optional, Union, AsyncIterator, cast
-from zlib import decompressobj
+import socket
+from struct import Struct, pack
+from typing import Any, Dict, Optional, Tuple, Union, AsyncIterator, cast
 
 import numpy as np
 
@@ -29,6 +32,15 @@ except ImportError:
     # Fallback for older cryptography versions
     from cryptography.hazmat.primitives.ciphers.algorithms import TripleDES
 
+try:
+    # ISA-L's SIMD inflate is several times faster than stock zlib on framebuffer data
+    from isal.isal_zlib import decompressobj  # type: ignore[import-not-found, unused-ignore]
+except ImportError:
+    try:
+        from zlib_ng.zlib_ng import decompressobj  # type: ignore[assignment, import-not-found, no-redef, unused-ignore]
+    except ImportError:
+        from zlib import decompressobj  # type: ignore[assignment, unused-ignore]
+
 from .pyvnc_common import (
     AUTH_STATE_FAILED,
     AUTH_STATE_LOCKOUT,
@@ -42,7 +54,9 @@ from .pyvnc_common import (
     MSG_TYPE_FRAMEBUFFER_UPDATE,
     MSG_TYPE_CLIPBOARD,
     ENCODING_RAW,
+    ENCODING_COPYRECT,
     ENCODING_ZLIB,
+    ENCODING_ZRLE,
     MOUSE_BUTTON_LEFT,
     MOUSE_BUTTON_SCROLL_UP,
     MOUSE_BUTTON_SCROLL_DOWN,
@@ -57,25 +71,54 @@ from .pyvnc_common import (
     slice_rect,
     key_codes,
 )
+from .pyvnc_kernels import blit_rgb, decode_zrle
 
 logger = logging.getLogger(__name__)
 
 
 RFC_6143_CANON_STRING_ENCODING = "latin-1"
-SUPPORTED_ENCODINGS = {
+# In order of preference; RAW is always supported and need not be advertised
+SUPPORTED_ENCODINGS = (
+    ENCODING_ZRLE,
     ENCODING_ZLIB,
-}
+    ENCODING_COPYRECT,
+)
+
+# VNC authentication uses the password with the bits of each byte mirrored as the DES key
+BIT_REVERSE_TABLE = bytes(int(f"{n:08b}"[::-1], 2) for n in range(256))
+
+# StreamReader stops reading from the socket once it buffers twice this many bytes;
+# the default of 64 KiB pauses the transport repeatedly while large rectangles arrive
+STREAM_READER_LIMIT = 1 << 20
+
+# Server -> client message layouts
+# https://datatracker.ietf.org/doc/html/rfc6143#section-7.6.1
+FRAMEBUFFER_UPDATE_STRUCT = Struct("!xH")
+RECT_HEADER_STRUCT = Struct("!HHHHi")
+COPYRECT_STRUCT = Struct("!HH")
+
+# Client -> server message layouts
+# https://datatracker.ietf.org/doc/html/rfc6143#section-7.5
+FRAMEBUFFER_UPDATE_REQUEST_STRUCT = Struct("!BBHHHH")
+KEY_EVENT_STRUCT = Struct("!BBxxI")
+POINTER_EVENT_STRUCT = Struct("!BBHH")
+
+
+def _set_encodings_message(encodings: Tuple[int, ...]) -> bytes:
+    """Build a SetEncodings message advertising *encodings* in order of preference."""
+    return pack(f"!BxH{len(encodings)}i", 2, len(encodings), *encodings)
+
+
+# Sent on every (re)connect, so it is built once
+SET_ENCODINGS_MESSAGE = _set_encodings_message(SUPPORTED_ENCODINGS)
 
 
 async def _read_bytes(reader: asyncio.StreamReader, length: int) -> bytes:
     """Read *length* bytes from the given stream reader."""
-    data = b""
-    while len(data) < length:
-        chunk = await reader.read(length - len(data))
-        if not chunk:
-            raise ConnectionError("Connection closed unexpectedly")
-        data += chunk
-    return data
+    try:
+        return await reader.readexactly(length)
+    except asyncio.IncompleteReadError as e:
+        raise ConnectionError("Connection closed unexpectedly") from e
 
 
 async def _read_int(reader: asyncio.StreamReader, length: int) -> int:
@@ -83,6 +126,24 @@ async def _read_int(reader: asyncio.StreamReader, length: int) -> int:
     return int.from_bytes(await _read_bytes(reader, length), "big")
 
 
+@lru_cache(maxsize=None)
+def _key_event_packets(key: str) -> Tuple[bytes, bytes]:
+    """Build the (press, release) KeyEvent messages for *key*, once per key."""
+    code = key_codes[key]
+    return KEY_EVENT_STRUCT.pack(4, 1, code), KEY_EVENT_STRUCT.pack(4, 0, code)
+
+
+@dataclass
+class _InputBatch:
+    """Input queued by one task's VNCClient.batch() block."""
+
+    data: bytearray = field(default_factory=bytearray)
+    # Pointer state the server will have once data is sent; None if data moves nothing
+    last_pointer_event: Optional[bytes] = None
+    # Key and button releases within data, still sent if the block raises
+    releases: bytearray = field(default_factory=bytearray)
+
+
 class VNCClient:
     """An asynchronous VNC client with a persistent background event loop."""
 
@@ -91,6 +152,8 @@ class VNCClient:
         config: VNCConfig,
     ):
         self._config = config
+        # Copied from the config, which is frozen, so close() can switch it off
+        self._auto_reconnect = config.auto_reconnect
 
         # Connection state (initialized in _perform_handshake)
         self._reader: Optional[asyncio.StreamReader] = None
@@ -100,17 +163,23 @@ class VNCClient:
         self.desktop_name: str = ""
 
         self._zlib_decompress = decompressobj().decompress
+        self._zrle_decompress = decompressobj().decompress
+        self._zlib_scratch = bytearray()
 
         # internal state
         self._pixels_rgba: Optional[np.ndarray] = None
         self._pixels_lock = asyncio.Lock()
         self._mouse_position: Point = Point(0, 0)  # not a literal type
         self._mouse_buttons: int = 0  # not a literal type
+        self._last_pointer_event = b""
+        # Open batch() blocks, keyed by the task that opened them
+        self._input_batches: Dict[Optional[asyncio.Task[Any]], _InputBatch] = {}
 
         # Background task management
         self._running = False
         self._listener_task: Optional[asyncio.Task[None]] = None
         self._capture_event = asyncio.Event()
+        self._needs_full_update = True
 
         # Reconnection state
         self._connected = False
@@ -126,11 +195,19 @@ class VNCClient:
         """
         # Connect and handshake
         self._reader, self._writer = await asyncio.wait_for(
-            asyncio.open_connection(self._config.host, self._config.port),
+            asyncio.open_connection(
+                self._config.host, self._config.port, limit=STREAM_READER_LIMIT
+            ),
             timeout=self._config.connection_timeout,
         )
         assert self._reader is not None and self._writer is not None
 
+        # Key and pointer events are tiny; never let Nagle hold them back. asyncio
+        # already does this for its own TCP transports, but not every event loop does
+        sock = self._writer.get_extra_info("socket")
+        if sock is not None and sock.family in (socket.AF_INET, socket.AF_INET6):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
         intro = await _read_bytes(self._reader, VNC_PROTOCOL_HEADER_SIZE)
         if intro[:4] != VNC_PROTOCOL_PREFIX:
             raise ValueError("not a VNC server")
@@ -138,9 +215,8 @@ class VNCClient:
         await self._writer.drain()
 
         # Negotiate an authentication type
-        auth_types = set(
-            await _read_bytes(self._reader, await _read_int(self._reader, 1))
-        )
+        # membership tests on the raw bytes are a byte scan, no set needed
+        auth_types = await _read_bytes(self._reader, await _read_int(self._reader, 1))
         if not auth_types:
             reason = await _read_bytes(self._reader, await _read_int(self._reader, 4))
             raise ValueError(reason.decode("utf8"))
@@ -148,7 +224,7 @@ class VNCClient:
             if auth_type in auth_types:
                 break
         else:
-            raise ValueError(f"unsupported VNC auth types: {auth_types}")
+            raise ValueError(f"unsupported VNC auth types: {sorted(auth_types)}")
 
         # Authentication routines are taken from https://github.com/barneygale/pytest-vnc/blob/main/pytest_vnc.py
 
@@ -161,7 +237,7 @@ class VNCClient:
             des_key = self._config.password.encode(RFC_6143_CANON_STRING_ENCODING)[
                 :8
             ].ljust(8, b"\x00")
-            des_key = bytes(int(bin(n)[:1:-1].ljust(8, "0"), 2) for n in des_key)
+            des_key = des_key.translate(BIT_REVERSE_TABLE)
             encryptor = Cipher(TripleDES(des_key), ECB()).encryptor()
             challenge = await _read_bytes(self._reader, 16)
             self._writer.write(encryptor.update(challenge) + encryptor.finalize())
@@ -231,6 +307,12 @@ class VNCClient:
 
         # at this point in time, the connection is live
         self.rect = Rect(0, 0, framebuffer_width, framebuffer_height)
+        self._needs_full_update = True
+        self._last_pointer_event = b""
+
+        # each connection starts fresh zlib streams for the ZLIB and ZRLE encodings
+        self._zlib_decompress = decompressobj().decompress
+        self._zrle_decompress = decompressobj().decompress
 
         # some servers, like VMw, ignore sent pixel formats, so if it's possible to use the one that has been sent to us we will use it
         if not self.pixel_format.true_color_flag:
@@ -248,7 +330,9 @@ class VNCClient:
         elif self.pixel_format.big_endian_flag:
             raise NotImplementedError("Only little-endian pixel colors are supported.")
 
-        await self._set_encodings(*SUPPORTED_ENCODINGS)
+        # written directly: _safe_write refuses to send until the handshake has completed
+        self._writer.write(SET_ENCODINGS_MESSAGE)
+        await self._writer.drain()
 
     @classmethod
     async def connect(cls, config: VNCConfig) -> "VNCClient":
@@ -378,8 +462,8 @@ class VNCClient:
                         self._framebuffer_listener(), name="vnc_frame_listener"
                     )
 
-                    # Reset framebuffer since dimensions may have changed
-                    self._pixels_rgba = None
+                    # The framebuffer is kept across reconnects and only reallocated
+                    # by _ensure_framebuffer if the dimensions have changed
 
                     # Restore mouse position on reconnect
                     await self.move(self._mouse_position)
@@ -414,7 +498,7 @@ class VNCClient:
     async def close(self) -> None:
         """Close the VNC connection and stop background task."""
         self._running = False
-        self._config.auto_reconnect = False  # Prevent auto-reconnect on close
+        self._auto_reconnect = False  # Prevent auto-reconnect on close
 
         if self._listener_task:
             self._listener_task.cancel()
@@ -465,7 +549,7 @@ class VNCClient:
                 logger.warning("Connection lost, attempting to reconnect...")
                 self._connected = False
 
-                if self._config.auto_reconnect:
+                if self._auto_reconnect:
                     success = await self._reconnect()
                     if not success:
                         # Reconnection failed, stop the listener
@@ -480,39 +564,138 @@ class VNCClient:
                 logger.exception("Error in framebuffer listener")
                 continue
 
+    def _ensure_framebuffer(self) -> np.ndarray:
+        """
+        Return the persistent RGBA framebuffer, allocating it only when missing or resized.
+
+        The buffer is reused for the lifetime of the client so that updates are written
+        in place rather than into a fresh full-screen allocation.
+        """
+        shape = (self.rect.height, self.rect.width, 4)
+        if self._pixels_rgba is None or self._pixels_rgba.shape != shape:
+            self._pixels_rgba = np.zeros(shape, "B")
+            # Alpha is always opaque, so it is filled once here instead of per rectangle
+            self._pixels_rgba[:, :, 3] = 255
+        return self._pixels_rgba
+
+    def _zrle_cpixel_offset(self) -> int:
+        """
+        Byte offset of the 3-byte ZRLE compressed pixel within a native pixel.
+
+        CPIXELs drop the byte of a 32bpp, depth-24 pixel that carries no colour,
+        which is the most significant byte unless all channels are shifted above it.
+        """
+        pf = self.pixel_format
+        return 1 if min(pf.red_shift, pf.green_shift, pf.blue_shift) >= 8 else 0
+
+    async def _read_zlib_area(self, length: int, size: int) -> memoryview:
+        """
+        Inflate a ZLIB rectangle of *length* compressed bytes into the scratch buffer.
+
+        Compressed data is fed to the decompressor as it arrives from the socket and
+        the output is written into a buffer that is reused across rectangles, so
+        neither the compressed nor the decompressed rectangle is held as a whole.
+        When the whole rectangle arrives at once, the inflated bytes are returned
+        as-is, skipping the copy into the scratch buffer.
+        """
+        if self._reader is None:
+            raise ConnectionError("Reader is None")
+        if len(self._zlib_scratch) < size:
+            self._zlib_scratch = bytearray(size)
+        area = memoryview(self._zlib_scratch)[:size]
+
+        offset = 0
+        while length:
+            chunk = await self._reader.read(length)
+            if not chunk:
+                raise ConnectionError("Connection closed unexpectedly")
+            length -= len(chunk)
+            inflated = self._zlib_decompress(chunk)
+            if not offset and not length and len(inflated) == size:
+                return memoryview(inflated)
+            if offset + len(inflated) > size:
+                raise ValueError("ZLIB rectangle is larger than its bounds")
+            area[offset : offset + len(inflated)] = inflated
+            offset += len(inflated)
+
+        if offset != size:
+            raise ValueError("ZLIB rectangle is smaller than its bounds")
+        return area
+
     async def _handle_framebuffer_update(self) -> None:
         """Process a framebuffer update message from the server."""
         if self._reader is None:
             raise ConnectionError("Reader is None")
-        await _read_bytes(self._reader, 1)  # padding
-
-        num_rects = await _read_int(self._reader, 2)
+        (num_rects,) = FRAMEBUFFER_UPDATE_STRUCT.unpack(
+            await _read_bytes(self._reader, FRAMEBUFFER_UPDATE_STRUCT.size)
+        )
 
         async with self._pixels_lock:
-            if self._pixels_rgba is None:
-                # Initialize framebuffer on first update
-                self._pixels_rgba = np.zeros(
-                    (self.rect.height, self.rect.width, 4), "B"
-                )
+            pixels_rgba = self._ensure_framebuffer()
 
             for _ in range(num_rects):
-                area_rect = Rect(
-                    await _read_int(self._reader, 2),
-                    await _read_int(self._reader, 2),
-                    await _read_int(self._reader, 2),
-                    await _read_int(self._reader, 2),
+                x, y, width, height, area_encoding = RECT_HEADER_STRUCT.unpack(
+                    await _read_bytes(self._reader, RECT_HEADER_STRUCT.size)
                 )
-                area_encoding = await _read_int(self._reader, 4)
+                area_rect = Rect(x, y, width, height)
+                # Slicing would silently clip an oversized rectangle, and the Numba
+                # kernels do not bounds-check their writes
+                if x + width > self.rect.width or y + height > self.rect.height:
+                    raise ValueError(
+                        f"Rectangle {tuple(area_rect)} lies outside the "
+                        f"{self.rect.width}x{self.rect.height} framebuffer"
+                    )
 
-                if area_encoding == ENCODING_RAW:
-                    area = await _read_bytes(
-                        self._reader, area_rect.height * area_rect.width * 4
+                if area_encoding == ENCODING_COPYRECT:
+                    # Copy a region already in the framebuffer, e.g. a moved window
+                    src_x, src_y = COPYRECT_STRUCT.unpack(
+                        await _read_bytes(self._reader, 4)
                     )
+                    if (
+                        src_x + width > self.rect.width
+                        or src_y + height > self.rect.height
+                    ):
+                        raise ValueError(
+                            f"CopyRect source {(src_x, src_y)} lies outside the "
+                            f"{self.rect.width}x{self.rect.height} framebuffer"
+                        )
+                    np.copyto(
+                        pixels_rgba[slice_rect(area_rect)],
+                        pixels_rgba[
+                            slice_rect(
+                                Rect(src_x, src_y, area_rect.width, area_rect.height)
+                            )
+                        ],
+                    )
+                    continue
+
+                area_pixels_native: np.ndarray
+                if area_encoding == ENCODING_RAW:
+                    area_pixels_native = np.frombuffer(
+                        await _read_bytes(
+                            self._reader, area_rect.height * area_rect.width * 4
+                        ),
+                        dtype=np.uint8,
+                    ).reshape(area_rect.height, area_rect.width, 4)
                 elif area_encoding == ENCODING_ZLIB:
-                    compressed = await _read_bytes(
-                        self._reader, await _read_int(self._reader, 4)
+                    area_pixels_native = np.frombuffer(
+                        await self._read_zlib_area(
+                            await _read_int(self._reader, 4),
+                            area_rect.height * area_rect.width * 4,
+                        ),
+                        dtype=np.uint8,
+                    ).reshape(area_rect.height, area_rect.width, 4)
+                elif area_encoding == ENCODING_ZRLE:
+                    area_pixels_native = decode_zrle(
+                        self._zrle_decompress(
+                            await _read_bytes(
+                                self._reader, await _read_int(self._reader, 4)
+                            )
+                        ),
+                        area_rect.width,
+                        area_rect.height,
+                        self._zrle_cpixel_offset(),
                     )
-                    area = self._zlib_decompress(compressed)
                 else:
                     # Skip unsupported encoding
                     logger.warning(
@@ -520,26 +703,15 @@ class VNCClient:
                     )
                     continue
 
-                area_pixels_native = np.ndarray(
-                    (area_rect.height, area_rect.width, 4), "B", area
-                )
-                area_pixels_rgba = area_pixels_native.copy()
+                # Only the colour channels are written; alpha was filled on allocation
+                area_pixels_rgba = pixels_rgba[slice_rect(area_rect)]
 
                 # Channel index = shift // 8 (each channel is 8 bits wide)
                 r_idx = self.pixel_format.red_shift // 8
                 g_idx = self.pixel_format.green_shift // 8
                 b_idx = self.pixel_format.blue_shift // 8
 
-                # Determine if any channel is out of standard RGBA order (R=0, G=1, B=2)
-                if r_idx != 0 or g_idx != 1 or b_idx != 2:
-                    area_pixels_rgba[:, :, 0] = area_pixels_native[:, :, r_idx]  # R
-                    area_pixels_rgba[:, :, 1] = area_pixels_native[:, :, g_idx]  # G
-                    area_pixels_rgba[:, :, 2] = area_pixels_native[:, :, b_idx]  # B
-
-                self._pixels_rgba[slice_rect(area_rect)] = area_pixels_rgba
-                self._pixels_rgba[slice_rect(area_rect, slice(3, 4))] = (
-                    255  # Set alpha channel
-                )
+                blit_rgb(area_pixels_rgba, area_pixels_native, r_idx, g_idx, b_idx)
 
         # Signal that new framebuffer data is available
         self._capture_event.set()
@@ -556,7 +728,7 @@ class VNCClient:
             await self._reconnect_event.wait()
 
         if self._writer is None or not self._connected:
-            if self._config.auto_reconnect and self._running:
+            if self._auto_reconnect and self._running:
                 success = await self._reconnect()
                 if not success:
                     return False
@@ -571,7 +743,7 @@ class VNCClient:
         except (ConnectionError, OSError) as e:
             logger.warning(f"Write failed: {e}")
             self._connected = False
-            if self._config.auto_reconnect and self._running:
+            if self._auto_reconnect and self._running:
                 success = await self._reconnect()
                 if success and self._writer is not None:
                     # Retry the write after reconnection
@@ -586,22 +758,21 @@ class VNCClient:
 
     # 2
     async def _set_encodings(self, *encodings: int) -> None:
-        await self._safe_write(
-            b"\x02\x00"
-            + len(encodings).to_bytes(2, "big")
-            + b"".join(encoding.to_bytes(4, "big") for encoding in encodings)
-        )
+        await self._safe_write(_set_encodings_message(encodings))
 
     # 3
-    async def _framebuffer_update_request(self, rect: Rect) -> bool:
+    async def _framebuffer_update_request(
+        self, rect: Rect, incremental: bool = False
+    ) -> bool:
         """Send a framebuffer update request to the VNC server."""
-        return await self._safe_write(
-            b"\x03\x00"
-            + rect.x.to_bytes(2, "big")
-            + rect.y.to_bytes(2, "big")
-            + rect.width.to_bytes(2, "big")
-            + rect.height.to_bytes(2, "big")
+        packet = FRAMEBUFFER_UPDATE_REQUEST_STRUCT.pack(
+            3, incremental, rect.x, rect.y, rect.width, rect.height
         )
+        batch = self._input_batches.get(asyncio.current_task())
+        if batch is not None and batch.data:
+            # Input queued by batch() goes first so that the update reflects it
+            return await self._send_batch(batch, packet)
+        return await self._safe_write(packet)
 
     # 6
     async def _client_cut_text(self) -> None:
@@ -613,6 +784,7 @@ class VNCClient:
         *,
         wait: bool = True,
         timeout: Optional[float] = 10.0,
+        incremental: bool = False,
     ) -> np.ndarray:
         """
         Take a screenshot and return pixels as an RGBA numpy array.
@@ -622,6 +794,11 @@ class VNCClient:
             wait: If True, wait for the server to send an update before returning.
                   If False, return current buffer (may be None if no data yet).
             timeout: Maximum time to wait for update (seconds). None for no timeout.
+            incremental: If True, ask the server only for the parts of the region that
+                  changed since the last update and merge them into the cached
+                  framebuffer. Servers may hold incremental requests until something
+                  changes, so with wait=True an idle screen waits for the timeout.
+                  The first capture after (re)connecting is always a full request.
 
         Returns:
             RGBA numpy array of the specified region.
@@ -635,7 +812,7 @@ class VNCClient:
             await self._reconnect_event.wait()
 
         if not self._connected:
-            if self._config.auto_reconnect and self._running:
+            if self._auto_reconnect and self._running:
                 success = await self._reconnect()
                 if not success:
                     raise ConnectionError("Connection down and reconnection failed")
@@ -652,16 +829,24 @@ class VNCClient:
         # Ensure we have a valid target rect
         assert isinstance(target_rect, Rect)
 
+        # Incremental updates are only meaningful once the framebuffer has been seeded
+        if self._needs_full_update:
+            incremental = False
+            if target_rect == self.rect:
+                self._needs_full_update = False
+
+        # Clear before requesting so that a fast reply is not missed
+        self._capture_event.clear()
+
         # Request update from server
-        success = await self._framebuffer_update_request(target_rect)
+        success = await self._framebuffer_update_request(target_rect, incremental)
         if not success:
             raise ConnectionError(
                 "Failed to send framebuffer request - connection down"
             )
 
         if wait:
-            # Clear event and wait for update
-            self._capture_event.clear()
+            # Wait for update
             try:
                 await asyncio.wait_for(self._capture_event.wait(), timeout=timeout)
             except asyncio.TimeoutError:
@@ -675,23 +860,117 @@ class VNCClient:
 
     # Keyboard and mouse methods unchanged from original
 
+    async def _write_input(
+        self,
+        data: bytes,
+        pointer_event: Optional[bytes] = None,
+        release: bool = False,
+    ) -> bool:
+        """
+        Send key or pointer events, or queue them while this task is inside batch().
+
+        *pointer_event* is the pointer state the server has once *data* is applied.
+        It is only remembered for deduplication after the data has been sent.
+        *release* marks data that lets go of a held key or button.
+        """
+        batch = self._input_batches.get(asyncio.current_task())
+        if batch is not None:
+            batch.data += data
+            if pointer_event is not None:
+                batch.last_pointer_event = pointer_event
+            if release:
+                batch.releases += data
+            return True
+        if not await self._safe_write(data):
+            return False
+        if pointer_event is not None:
+            self._last_pointer_event = pointer_event
+        return True
+
+    async def _send_batch(self, batch: _InputBatch, suffix: bytes = b"") -> bool:
+        """Send and empty a batch's queued input, followed by *suffix*."""
+        data = bytes(batch.data) + suffix
+        pointer_event = batch.last_pointer_event
+        batch.data.clear()
+        batch.last_pointer_event = None
+        batch.releases.clear()
+        if not await self._safe_write(data):
+            return False
+        if pointer_event is not None:
+            self._last_pointer_event = pointer_event
+        return True
+
+    @asynccontextmanager
+    async def batch(self) -> AsyncIterator["VNCClient"]:
+        """
+        Context manager that queues keyboard and mouse input and sends it in one write on exit.
+
+        Only input from the task that entered the block is queued; other tasks
+        using the same client keep writing immediately. A capture() inside the
+        block sends the queued input first, so the screenshot reflects it. If the
+        block raises, input still queued is dropped rather than sending a
+        half-finished sequence, except for releases from hold_key() and
+        hold_mouse(), so that nothing already pressed stays held on the server.
+        """
+        task = asyncio.current_task()
+        if task in self._input_batches:
+            # Nested batches join the outermost one
+            yield self
+            return
+        batch = self._input_batches[task] = _InputBatch()
+        try:
+            yield self
+        except BaseException:
+            if batch.releases:
+                # The server's pointer state is unknown now, so never skip the next move
+                self._last_pointer_event = b""
+                if not await self._safe_write(bytes(batch.releases)):
+                    logger.warning("Failed to send batched key and button releases")
+            raise
+        finally:
+            del self._input_batches[task]
+        # Only reached when the block exits cleanly
+        if batch.data and not await self._send_batch(batch):
+            raise ConnectionError("Failed to send batched input - connection down")
+
     @asynccontextmanager
     async def _write_key(self, key: str) -> AsyncIterator["VNCClient"]:
-        data = key_codes[key].to_bytes(4, "big")
-        success = await self._safe_write(b"\x04\x01\x00\x00" + data)
+        down, up = _key_event_packets(key)
+        success = await self._write_input(down)
         if not success:
             raise ConnectionError("Failed to send key press - connection down")
         try:
             yield self
         finally:
-            await self._safe_write(b"\x04\x00\x00\x00" + data)
-
-    async def _write_mouse(self) -> None:
-        await self._safe_write(
-            b"\x05"
-            + self._mouse_buttons.to_bytes(1, "big")
-            + self._mouse_position.x.to_bytes(2, "big")
-            + self._mouse_position.y.to_bytes(2, "big")
+            await self._write_input(up, release=True)
+
+    def _pointer_event(self, buttons: int) -> bytes:
+        return POINTER_EVENT_STRUCT.pack(
+            5, buttons, self._mouse_position.x, self._mouse_position.y
+        )
+
+    def _current_pointer_event(self) -> bytes:
+        """The pointer state the server will have once this task's queued input is sent."""
+        batch = self._input_batches.get(asyncio.current_task())
+        if batch is not None and batch.last_pointer_event is not None:
+            return batch.last_pointer_event
+        return self._last_pointer_event
+
+    async def _write_mouse(self, release: bool = False) -> None:
+        packet = self._pointer_event(self._mouse_buttons)
+        # The server already has this pointer state, e.g. click_at on the same point
+        if packet == self._current_pointer_event():
+            return
+        await self._write_input(packet, packet, release)
+
+    async def _write_clicks(self, button: int, repeat: int = 1) -> None:
+        """Press and release a button *repeat* times in a single write."""
+        mask = 1 << button
+        self._mouse_buttons &= ~mask
+        released = self._pointer_event(self._mouse_buttons)
+        await self._write_input(
+            (self._pointer_event(self._mouse_buttons | mask) + released) * repeat,
+            released,
         )
 
     @asynccontextmanager
@@ -704,15 +983,23 @@ class VNCClient:
 
     async def press(self, *keys: str) -> "VNCClient":
         """Push all given keys, then release them in reverse order."""
-        async with self.hold_key(*keys):
-            pass
+        # Nothing runs between press and release, so the whole chord is one write
+        packets = [_key_event_packets(key) for key in keys]
+        success = await self._write_input(
+            b"".join(down for down, _ in packets)
+            + b"".join(up for _, up in reversed(packets))
+        )
+        if not success:
+            raise ConnectionError("Failed to send key press - connection down")
         return self
 
     async def write(self, text: str) -> "VNCClient":
         """Push and release each key one after the other."""
-        for key in text:
-            async with self.hold_key(key):
-                pass
+        # All press/release pairs are sent in a single write instead of two per key
+        packets = b"".join(b"".join(_key_event_packets(key)) for key in text)
+        success = await self._write_input(packets)
+        if not success:
+            raise ConnectionError("Failed to send key press - connection down")
         return self
 
     @asynccontextmanager
@@ -727,30 +1014,26 @@ class VNCClient:
             yield self
         finally:
             self._mouse_buttons &= ~mask
-            await self._write_mouse()
+            await self._write_mouse(release=True)
 
     async def click(self, button: int = MOUSE_BUTTON_LEFT) -> "VNCClient":
         """Press and release a mouse button."""
-        async with self.hold_mouse(button):
-            pass
+        await self._write_clicks(button)
         return self
 
     async def double_click(self, button: int = MOUSE_BUTTON_LEFT) -> "VNCClient":
         """Press and release a mouse button twice."""
-        await self.click(button)
-        await self.click(button)
+        await self._write_clicks(button, 2)
         return self
 
     async def scroll_up(self, repeat: int = 1) -> "VNCClient":
         """Scroll the mouse wheel upwards."""
-        for _ in range(repeat):
-            await self.click(MOUSE_BUTTON_SCROLL_UP)
+        await self._write_clicks(MOUSE_BUTTON_SCROLL_UP, repeat)
         return self
 
     async def scroll_down(self, repeat: int = 1) -> "VNCClient":
         """Scroll the mouse wheel downwards."""
-        for _ in range(repeat):
-            await self.click(MOUSE_BUTTON_SCROLL_DOWN)
+        await self._write_clicks(MOUSE_BUTTON_SCROLL_DOWN, repeat)
         return self
 
     async def move(self, point: Union[Point, PointLike]) -> "VNCClient":
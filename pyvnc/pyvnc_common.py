@@ -11,6 +11,7 @@ from abc import ABC, abstractmethod
 from collections import namedtuple
 from dataclasses import dataclass
 from dataclasses import astuple
+from functools import lru_cache
 from struct import unpack, pack
 from typing import Dict, Optional, Self, Tuple
 
@@ -40,7 +41,9 @@ MSG_TYPE_CLIPBOARD = 2
 
 # VNC encodings
 ENCODING_RAW = 0
+ENCODING_COPYRECT = 1
 ENCODING_ZLIB = 6
+ENCODING_ZRLE = 16
 
 # Mouse buttons
 MOUSE_BUTTON_LEFT = 0
@@ -50,18 +53,22 @@ MOUSE_BUTTON_SCROLL_UP = 3
 MOUSE_BUTTON_SCROLL_DOWN = 4
 
 # Keyboard keys
-_key_codes_mut: Dict[str, int] = {}
-_key_codes_mut.update((name, code) for name, code, char in keysymdef)
-_key_codes_mut.update((chr(char), code) for name, code, char in keysymdef if char)
-_key_codes_mut["Del"] = _key_codes_mut["Delete"]
-_key_codes_mut["Esc"] = _key_codes_mut["Escape"]
-_key_codes_mut["Cmd"] = _key_codes_mut["Super_L"]
-_key_codes_mut["Alt"] = _key_codes_mut["Alt_L"]
-_key_codes_mut["Ctrl"] = _key_codes_mut["Control_L"]
-_key_codes_mut["Super"] = _key_codes_mut["Super_L"]
-_key_codes_mut["Shift"] = _key_codes_mut["Shift_L"]
-_key_codes_mut["Backspace"] = _key_codes_mut["BackSpace"]
-_key_codes_mut["Space"] = _key_codes_mut["space"]
+_KEY_ALIASES = (
+    ("Del", "Delete"),
+    ("Esc", "Escape"),
+    ("Cmd", "Super_L"),
+    ("Alt", "Alt_L"),
+    ("Ctrl", "Control_L"),
+    ("Super", "Super_L"),
+    ("Shift", "Shift_L"),
+    ("Backspace", "BackSpace"),
+    ("Space", "space"),
+)
+_key_codes_mut: Dict[str, int] = {
+    **{name: code for name, code, char in keysymdef},
+    **{chr(char): code for name, code, char in keysymdef if char},
+}
+_key_codes_mut.update({alias: _key_codes_mut[name] for alias, name in _KEY_ALIASES})
 key_codes = frozendict(_key_codes_mut)
 del _key_codes_mut
 
@@ -140,14 +147,23 @@ class RectLike(ABC):
         pass
 
 
+@lru_cache(maxsize=4096)
+def _rect_slices(rect: Rect) -> Tuple[slice, slice]:
+    return (
+        slice(rect.y, rect.y + rect.height),
+        slice(rect.x, rect.x + rect.width),
+    )
+
+
 def slice_rect(rect: Rect, *channels: slice) -> Tuple[slice, ...]:
     """
     A sequence of slice objects that can be used to address a numpy array.
+
+    The row and column slices are cached per rect, since servers send the same
+    tile geometry over and over.
     """
-    return (
-        slice(rect.y, rect.y + rect.height),
-        slice(rect.x, rect.x + rect.width),
-    ) + channels
+    slices = _rect_slices(rect)
+    return slices + channels if channels else slices
 
 
 # no type for a byte string of a particular length
@@ -175,9 +191,9 @@ def pack_apple_remote_desktop(material: str) -> bytes:
         return material_cstr_bytes
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class VNCConfig:
-    """Configuration for VNC connection."""
+    """Configuration for VNC connection. Immutable, so one config can be shared."""
 
     host: str = "localhost"
     port: int = 5900
@@ -206,7 +222,9 @@ __all__ = [
     "MSG_TYPE_FRAMEBUFFER_UPDATE",
     "MSG_TYPE_CLIPBOARD",
     "ENCODING_RAW",
+    "ENCODING_COPYRECT",
     "ENCODING_ZLIB",
+    "ENCODING_ZRLE",
     "MOUSE_BUTTON_LEFT",
     "MOUSE_BUTTON_MIDDLE",
     "MOUSE_BUTTON_RIGHT",
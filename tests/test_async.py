@@ -5,9 +5,12 @@ Async tests for pyvnc library with background task.
 
 import unittest
 import asyncio
-import tempfile
+import importlib.util
+import io
 import os
 
+import numpy as np
+
 try:
     from dotenv import load_dotenv
 
@@ -22,6 +25,7 @@ from pyvnc import (
     Rect,
     PointLike,
     RectLike,
+    slice_rect,
     MOUSE_BUTTON_LEFT,
     MOUSE_BUTTON_MIDDLE,
     MOUSE_BUTTON_RIGHT,
@@ -47,140 +51,190 @@ def load_test_config() -> VNCConfig:
     )
 
 
-@unittest.skipIf(load_test_config() is None, "VNC_PASSWORD not configured")
+# Read once at import; the skip decorators and every test share it
+TEST_CONFIG = load_test_config()
+# Probed without importing, so Pillow is only loaded by the test that uses it
+HAS_PIL = importlib.util.find_spec("PIL") is not None
+
+
+@unittest.skipIf(TEST_CONFIG is None, "VNC_PASSWORD not configured")
 class TestVNCIntegration(unittest.TestCase):
     """Integration tests with real VNC server using async client and background task."""
 
+    @classmethod
+    def setUpClass(cls):
+        """Connect once and share the connection and its event loop across tests."""
+        cls.config = TEST_CONFIG
+        cls.loop = asyncio.new_event_loop()
+        cls.vnc = cls.loop.run_until_complete(VNCClient.connect(cls.config))
+
+    @classmethod
+    def tearDownClass(cls):
+        """Close the shared connection."""
+        cls.loop.run_until_complete(cls.vnc.close())
+        cls.loop.close()
+
     def setUp(self):
-        """Set up test configuration."""
-        self.config = load_test_config()
-        self.temp_dir = tempfile.mkdtemp()
+        """Park the pointer so tests do not depend on each other's moves."""
+        self.loop.run_until_complete(self.vnc.move(Point(0, 0)))
+
+    def test_capture_full(self):
+        """Test full-screen capture with background task and slicing a region out of it."""
+
+        async def run_test():
+            vnc = self.vnc
+            # Basic connection info
+            self.assertGreater(vnc.rect.width, 0)
+            self.assertGreater(vnc.rect.height, 0)
+
+            full_screenshot = await vnc.capture()
+            self.assertEqual(
+                full_screenshot.shape, (vnc.rect.height, vnc.rect.width, 4)
+            )
+            # Captures are packed uint8 copies, ready for PIL without another copy
+            self.assertEqual(full_screenshot.dtype, np.uint8)
+            self.assertTrue(full_screenshot.flags["C_CONTIGUOUS"])
 
-    def tearDown(self):
-        """Clean up temporary files."""
-        import shutil
+            # Test region slicing on the full capture; test_capture_region requests one
+            region = Rect(0, 0, min(200, vnc.rect.width), min(150, vnc.rect.height))
+            region_screenshot = full_screenshot[slice_rect(region)]
+            self.assertEqual(region_screenshot.shape, (region.height, region.width, 4))
 
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
+        self.loop.run_until_complete(run_test())
 
-    def test_comprehensive_vnc_functionality(self):
-        """Comprehensive test of all VNC functionality with background task."""
+    def test_capture_region(self):
+        """Test capturing a region relative to the screen size."""
 
         async def run_test():
-            async with await VNCClient.connect(self.config) as vnc:
-                # Basic connection info
-                self.assertGreater(vnc.rect.width, 0)
-                self.assertGreater(vnc.rect.height, 0)
-                rel_res = vnc.rect
-
-                # Test screenshots (background task handles updates)
-                full_screenshot = await vnc.capture()
-                self.assertEqual(len(full_screenshot.shape), 3)
-                self.assertEqual(full_screenshot.shape[2], 4)  # RGBA
-                self.assertEqual(full_screenshot.shape[0], vnc.rect.height)
-                self.assertEqual(full_screenshot.shape[1], vnc.rect.width)
-
-                # Test region capture
-                region = Rect(0, 0, min(200, vnc.rect.width), min(150, vnc.rect.height))
-                region_screenshot = await vnc.capture(region)
-                self.assertEqual(region_screenshot.shape[0], region.height)
-                self.assertEqual(region_screenshot.shape[1], region.width)
-
-                # Test relative coordinate capture
-                rel_region = Rect(
-                    rel_res.x // 4, rel_res.y // 4, rel_res.x // 4, rel_res.y // 4
-                )
-                rel_screenshot = await vnc.capture(rel_region)
-                self.assertEqual(len(rel_screenshot.shape), 3)
-                self.assertEqual(rel_screenshot.shape[2], 4)  # RGBA
-
-                # Test mouse operations with float-derived coordinates
-                center_x = rel_res.x / 2.0
-                center_y = rel_res.y / 2.0
-
-                await vnc.move(Point(int(center_x), int(center_y)))
-                await vnc.click(MOUSE_BUTTON_LEFT)
-                await vnc.click(MOUSE_BUTTON_MIDDLE)
-                await vnc.click(MOUSE_BUTTON_RIGHT)
-                await vnc.double_click(MOUSE_BUTTON_LEFT)
-
-                # Test scrolling
-                await vnc.scroll_up(3)
-                await vnc.scroll_down(2)
-
-                # Test click_at helpers
-                corner_x = rel_res.x / 10.0
-                corner_y = rel_res.y / 10.0
-                await vnc.click_at(
-                    Point(int(corner_x), int(corner_y)), MOUSE_BUTTON_LEFT
-                )
-                await vnc.double_click_at(
-                    Point(int(corner_x * 2), int(corner_y * 2)), MOUSE_BUTTON_LEFT
-                )
-
-                # Test drag operations with all mouse buttons
-                start_x = rel_res.x / 4.0
-                start_y = rel_res.y / 4.0
-                end_x = rel_res.x * 3.0 / 4.0
-                end_y = rel_res.y * 3.0 / 4.0
-
-                # Left button drag
-                await vnc.move(Point(int(start_x), int(start_y)))
-                async with vnc.hold_mouse(MOUSE_BUTTON_LEFT):
-                    await vnc.move(Point(int(end_x), int(end_y)))
+            vnc = self.vnc
+            width, height = vnc.rect.width, vnc.rect.height
+            rel_region = Rect(width // 4, height // 4, width // 4, height // 4)
+            rel_screenshot = await vnc.capture(rel_region)
+            self.assertEqual(
+                rel_screenshot.shape, (rel_region.height, rel_region.width, 4)
+            )
+            self.assertEqual(rel_screenshot.dtype, np.uint8)
+            self.assertTrue(rel_screenshot.flags["C_CONTIGUOUS"])
 
-                # Middle button drag
-                await vnc.move(Point(int(start_x * 1.1), int(start_y * 1.1)))
-                async with vnc.hold_mouse(MOUSE_BUTTON_MIDDLE):
-                    await vnc.move(Point(int(end_x * 0.9), int(end_y * 0.9)))
+        self.loop.run_until_complete(run_test())
 
-                # Right button drag
-                await vnc.move(Point(int(start_x * 1.2), int(start_y * 1.2)))
-                async with vnc.hold_mouse(MOUSE_BUTTON_RIGHT):
-                    await vnc.move(Point(int(end_x * 0.8), int(end_y * 0.8)))
+    def test_mouse_clicks(self):
+        """Test clicking every button, scrolling and the click_at helpers."""
 
-                # Test keyboard operations
-                await vnc.write("Hello async pyvnc!")
-                await vnc.press("Return")
+        async def run_test():
+            vnc = self.vnc
+            width, height = vnc.rect.width, vnc.rect.height
+            center = Point(width // 2, height // 2)
+            corner = Point(width // 10, height // 10)
+
+            await vnc.move(center)
+            for button in (
+                MOUSE_BUTTON_LEFT,
+                MOUSE_BUTTON_MIDDLE,
+                MOUSE_BUTTON_RIGHT,
+            ):
+                with self.subTest(click=button):
+                    await vnc.click(button)
+            await vnc.double_click(MOUSE_BUTTON_LEFT)
+
+            # Test scrolling
+            await vnc.scroll_up(3)
+            await vnc.scroll_down(2)
+
+            # Test click_at helpers
+            await vnc.click_at(corner, MOUSE_BUTTON_LEFT)
+            await vnc.double_click_at(
+                Point(corner.x * 2, corner.y * 2), MOUSE_BUTTON_LEFT
+            )
 
-                async with vnc.hold_key("Ctrl"):
-                    await vnc.press("a")  # Select all
+        self.loop.run_until_complete(run_test())
 
-                async with vnc.hold_key("Shift"):
-                    await vnc.press("a")
+    def test_mouse_drags(self):
+        """Test dragging with every mouse button."""
 
-        asyncio.run(run_test())
+        async def run_test():
+            vnc = self.vnc
+            width, height = vnc.rect.width, vnc.rect.height
+            start = Point(width // 4, height // 4)
+            end = Point(width * 3 // 4, height * 3 // 4)
+
+            # Scaled in tenths so every coordinate stays an integer
+            for button, start_tenths, end_tenths in (
+                (MOUSE_BUTTON_LEFT, 10, 10),
+                (MOUSE_BUTTON_MIDDLE, 11, 9),
+                (MOUSE_BUTTON_RIGHT, 12, 8),
+            ):
+                with self.subTest(drag=button):
+                    await vnc.move(
+                        Point(
+                            start.x * start_tenths // 10,
+                            start.y * start_tenths // 10,
+                        )
+                    )
+                    async with vnc.hold_mouse(button):
+                        await vnc.move(
+                            Point(end.x * end_tenths // 10, end.y * end_tenths // 10)
+                        )
+
+        self.loop.run_until_complete(run_test())
+
+    def test_keyboard(self):
+        """Test typing text, pressing keys and holding modifiers."""
 
-    def test_png_output(self):
-        """Test RGBA screenshot with PIL PNG output with background task."""
+        async def run_test():
+            vnc = self.vnc
+            await vnc.write("Hello async pyvnc!")
+            await vnc.press("Return")
+
+            async with vnc.hold_key("Ctrl"):
+                await vnc.press("a")  # Select all
+
+            async with vnc.hold_key("Shift"):
+                await vnc.press("a")
+
+        self.loop.run_until_complete(run_test())
+
+    def test_batched_input(self):
+        """Test that a mixed input sequence inside batch() is sent and flushed by capture."""
 
         async def run_test():
-            try:
-                from PIL import Image
+            vnc = self.vnc
+            async with vnc.batch():
+                await vnc.click_at(Point(10, 10), MOUSE_BUTTON_LEFT)
+                async with vnc.hold_mouse(MOUSE_BUTTON_LEFT):
+                    await vnc.move(Point(20, 20))
+                await vnc.write("batched")
+                # A capture inside the block sends the queued input ahead of its request
+                screenshot = await vnc.capture(Rect(0, 0, 16, 16))
+                self.assertEqual(screenshot.shape, (16, 16, 4))
+                await vnc.press("Return")
 
-                async with await VNCClient.connect(self.config) as vnc:
-                    screenshot = await vnc.capture()
+        self.loop.run_until_complete(run_test())
 
-                    # Convert to PIL Image
-                    image = Image.fromarray(screenshot, "RGBA")
-                    png_path = os.path.join(self.temp_dir, "test_screenshot.png")
+    @unittest.skipUnless(HAS_PIL, "PIL/Pillow not available")
+    def test_png_output(self):
+        """Test RGBA screenshot with PIL PNG output with background task."""
 
-                    # Save with timestamp
-                    import time
+        from PIL import Image
 
-                    timestamp = int(time.time())
-                    project_png = f"test_screenshot_{timestamp}.png"
-                    image.save(png_path, "PNG")
-                    image.save(project_png, "PNG")
+        async def run_test():
+            vnc = self.vnc
+            screenshot = await vnc.capture()
 
-                    # Verify file was created
-                    self.assertTrue(os.path.exists(png_path))
-                    file_size = os.path.getsize(png_path)
-                    self.assertGreater(file_size, 1000)
+            # Convert to PIL Image
+            image = Image.fromarray(screenshot, "RGBA")
+            self.assertEqual(image.mode, "RGBA")
+            self.assertEqual(image.size, (screenshot.shape[1], screenshot.shape[0]))
 
-            except ImportError:
-                self.skipTest("PIL/Pillow not available")
+            # PNG encoding only exercises Pillow, so it is opt-in
+            if os.getenv("PYVNC_TEST_PNG") == "1":
+                buffer = io.BytesIO()
+                # Fastest DEFLATE level; only the encoded size is checked
+                image.save(buffer, "PNG", compress_level=1)
+                # Should be reasonably sized
+                self.assertGreater(buffer.tell(), 1000)
 
-        asyncio.run(run_test())
+        self.loop.run_until_complete(run_test())
 
     def test_point_like_rect_like_usage(self):
         """Test using PointLike and RectLike objects."""
@@ -194,15 +248,15 @@ class TestVNCIntegration(unittest.TestCase):
                 return Rect(10, 10, 100, 100)
 
         async def run_test():
-            async with await VNCClient.connect(self.config) as vnc:
-                test_point = TestPoint()
-                await vnc.move(test_point)
+            vnc = self.vnc
+            test_point = TestPoint()
+            await vnc.move(test_point)
 
-                test_rect = TestRect()
-                region_screenshot = await vnc.capture(test_rect)
-                self.assertEqual(len(region_screenshot.shape), 3)
+            test_rect = TestRect()
+            region_screenshot = await vnc.capture(test_rect)
+            self.assertEqual(region_screenshot.shape, (100, 100, 4))
 
-        asyncio.run(run_test())
+        self.loop.run_until_complete(run_test())
 
     def test_context_manager(self):
         """Test async context manager functionality with background task."""
@@ -212,10 +266,10 @@ class TestVNCIntegration(unittest.TestCase):
             async with vnc:
                 self.assertGreater(vnc.rect.width, 0)
                 self.assertGreater(vnc.rect.height, 0)
-                screenshot = await vnc.capture()
-                self.assertEqual(len(screenshot.shape), 3)
+                screenshot = await vnc.capture(Rect(0, 0, 16, 16))
+                self.assertEqual(screenshot.shape, (16, 16, 4))
 
-        asyncio.run(run_test())
+        self.loop.run_until_complete(run_test())
 
     def test_manual_connection_cleanup(self):
         """Test manual connection and cleanup."""
@@ -224,12 +278,12 @@ class TestVNCIntegration(unittest.TestCase):
             vnc = await VNCClient.connect(self.config)
             try:
                 self.assertGreater(vnc.rect.width, 0)
-                screenshot = await vnc.capture()
-                self.assertEqual(len(screenshot.shape), 3)
+                screenshot = await vnc.capture(Rect(0, 0, 16, 16))
+                self.assertEqual(screenshot.shape, (16, 16, 4))
             finally:
                 await vnc.close()
 
-        asyncio.run(run_test())
+        self.loop.run_until_complete(run_test())
 
     def test_background_task_running(self):
         """Test that the background task is running during connection."""
@@ -241,27 +295,38 @@ class TestVNCIntegration(unittest.TestCase):
             await vnc.close()
             self.assertFalse(vnc._running)
 
-        asyncio.run(run_test())
+        self.loop.run_until_complete(run_test())
 
 
 class TestErrorHandling(unittest.TestCase):
     """Test error handling scenarios."""
 
+    @classmethod
+    def setUpClass(cls):
+        """Create one event loop shared by every test in the class."""
+        cls.loop = asyncio.new_event_loop()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Close the shared event loop."""
+        cls.loop.close()
+
     def test_invalid_connection(self):
         """Test connection to non-existent server."""
 
         async def run_test():
+            # Nothing listens on port 1, so the connection is refused at once
             bad_config = VNCConfig(
-                host="nonexistent.example.com", port=9999, connection_timeout=1.0
+                host="127.0.0.1", port=1, connection_timeout=1.0, max_retries=1
             )
             with self.assertRaises(Exception):
                 await VNCClient.connect(bad_config)
 
-        asyncio.run(run_test())
+        self.loop.run_until_complete(run_test())
 
     def test_invalid_key_code(self):
         """Test invalid key code handling."""
-        config = load_test_config()
+        config = TEST_CONFIG
         if config is None:
             self.skipTest("VNC_PASSWORD not configured")
 
@@ -273,7 +338,7 @@ class TestErrorHandling(unittest.TestCase):
             except Exception:
                 pass  # Connection might fail
 
-        asyncio.run(run_test())
+        self.loop.run_until_complete(run_test())
 
 
 def main():
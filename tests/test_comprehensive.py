@@ -5,10 +5,14 @@ Includes unit tests and integration tests using .env configuration.
 """
 
 import asyncio
+import dataclasses
+import importlib.util
+import io
 import unittest
-import tempfile
 import os
 
+import numpy as np
+
 try:
     from dotenv import load_dotenv
 
@@ -50,6 +54,31 @@ def load_test_config() -> VNCConfig:
     )
 
 
+# Read once at import; the skip decorators and every test share it
+TEST_CONFIG = load_test_config()
+# Probed without importing, so Pillow is only loaded by the test that uses it
+HAS_PIL = importlib.util.find_spec("PIL") is not None
+
+
+# Characters, keysym names and aliases that callers commonly rely on
+REQUIRED_KEYS = frozenset(
+    ("a", "A", "0", "Return", "Space", "Escape", "Esc", "Ctrl", "Alt", "Shift")
+)
+
+# Short key names and the X11 keysym names they stand for
+KEY_ALIASES = (
+    ("Esc", "Escape"),
+    ("Del", "Delete"),
+    ("Ctrl", "Control_L"),
+    ("Alt", "Alt_L"),
+    ("Shift", "Shift_L"),
+    ("Super", "Super_L"),
+    ("Cmd", "Super_L"),
+    ("Backspace", "BackSpace"),
+    ("Space", "space"),
+)
+
+
 class TestVNCConfig(unittest.TestCase):
     """Test VNCConfig class."""
 
@@ -77,6 +106,12 @@ class TestVNCConfig(unittest.TestCase):
         self.assertEqual(config.username, "testuser")
         self.assertEqual(config.password, "testpass")
 
+    def test_config_is_frozen(self):
+        """Test configuration cannot be changed after construction."""
+        config = VNCConfig()
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            config.port = 5901  # type: ignore[misc]
+
 
 class TestGeometry(unittest.TestCase):
     """Test geometry classes and functions."""
@@ -103,29 +138,39 @@ class TestGeometry(unittest.TestCase):
         self.assertEqual(slices[0], slice(20, 170))  # y, y+height
         self.assertEqual(slices[1], slice(10, 110))  # x, x+width
 
+    def test_slice_rect_indexes_framebuffer(self):
+        """Test that slice_rect addresses a (height, width, channels) array row-major."""
+        pixels = np.arange(200 * 300 * 4, dtype=np.uint32).reshape(200, 300, 4)
+        rect = Rect(10, 20, 100, 150)
+        area = pixels[slice_rect(rect)]
+        self.assertEqual(area.shape, (150, 100, 4))
+        self.assertEqual(area[0, 0, 0], pixels[20, 10, 0])
+        self.assertEqual(area[-1, -1, 0], pixels[169, 109, 0])
+        self.assertEqual(pixels[slice_rect(rect, slice(3, 4))].shape, (150, 100, 1))
+
+    def test_slice_rect_with_channels(self):
+        """Test slice_rect appends channel slices to the cached row/column slices."""
+        rect = Rect(10, 20, 100, 150)
+        self.assertEqual(
+            slice_rect(rect, slice(0, 3)),
+            (slice(20, 170), slice(10, 110), slice(0, 3)),
+        )
+        self.assertIs(slice_rect(rect), slice_rect(Rect(10, 20, 100, 150)))
+
 
 class TestKeyboardCodes(unittest.TestCase):
     """Test keyboard code mappings."""
 
     def test_key_codes_exist(self):
         """Test that common key codes exist."""
-        self.assertIn("a", key_codes)
-        self.assertIn("A", key_codes)
-        self.assertIn("0", key_codes)
-        self.assertIn("Return", key_codes)
-        self.assertIn("Space", key_codes)
-        self.assertIn("Escape", key_codes)
-        self.assertIn("Esc", key_codes)  # Alias
-        self.assertIn("Ctrl", key_codes)  # Alias
-        self.assertIn("Alt", key_codes)  # Alias
-        self.assertIn("Shift", key_codes)  # Alias
+        missing = REQUIRED_KEYS - key_codes.keys()
+        self.assertFalse(missing, f"missing keys: {sorted(missing)}")
 
     def test_key_code_aliases(self):
         """Test that key aliases work correctly."""
-        self.assertEqual(key_codes["Esc"], key_codes["Escape"])
-        self.assertEqual(key_codes["Ctrl"], key_codes["Control_L"])
-        self.assertEqual(key_codes["Alt"], key_codes["Alt_L"])
-        self.assertEqual(key_codes["Shift"], key_codes["Shift_L"])
+        for alias, name in KEY_ALIASES:
+            with self.subTest(alias=alias):
+                self.assertEqual(key_codes[alias], key_codes[name])
 
 
 class TestInterfaces(unittest.TestCase):
@@ -168,141 +213,182 @@ class TestInterfaces(unittest.TestCase):
         self.assertEqual(rect.height, 200)
 
 
-@unittest.skipIf(load_test_config() is None, "VNC_PASSWORD not configured")
+@unittest.skipIf(TEST_CONFIG is None, "VNC_PASSWORD not configured")
 class TestVNCIntegration(unittest.TestCase):
     """Integration tests with real VNC server."""
 
+    @classmethod
+    def setUpClass(cls):
+        """Connect once and share the connection and its event loop across tests."""
+        cls.config = TEST_CONFIG
+        cls.loop = asyncio.new_event_loop()
+        cls.vnc = cls.loop.run_until_complete(VNCClient.connect(cls.config))
+
+    @classmethod
+    def tearDownClass(cls):
+        """Close the shared connection."""
+        cls.loop.run_until_complete(cls.vnc.close())
+        cls.loop.close()
+
     def setUp(self):
-        """Set up test configuration."""
-        self.config = load_test_config()
-        self.temp_dir = tempfile.mkdtemp()
+        """Park the pointer so tests do not depend on each other's moves."""
+        self.loop.run_until_complete(self.vnc.move(Point(0, 0)))
 
-    def tearDown(self):
-        """Clean up temporary files."""
-        import shutil
+    def test_capture_full(self):
+        """Test full-screen capture and slicing a region out of it."""
 
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
+        async def run_test():
+            vnc = self.vnc
+            # Basic connection info
+            self.assertGreater(vnc.rect.width, 0)
+            self.assertGreater(vnc.rect.height, 0)
+
+            full_screenshot = await vnc.capture()
+            self.assertEqual(
+                full_screenshot.shape, (vnc.rect.height, vnc.rect.width, 4)
+            )
+            # Captures are packed uint8 copies, ready for PIL without another copy
+            self.assertEqual(full_screenshot.dtype, np.uint8)
+            self.assertTrue(full_screenshot.flags["C_CONTIGUOUS"])
+
+            # Test region slicing on the full capture; test_capture_region requests one
+            region = Rect(0, 0, min(200, vnc.rect.width), min(150, vnc.rect.height))
+            region_screenshot = full_screenshot[slice_rect(region)]
+            self.assertEqual(region_screenshot.shape, (region.height, region.width, 4))
 
-    def test_comprehensive_vnc_functionality(self):
-        """Comprehensive test of all VNC functionality."""
+        self.loop.run_until_complete(run_test())
+
+    def test_capture_region(self):
+        """Test capturing a region relative to the screen size."""
 
         async def run_test():
-            async with await VNCClient.connect(self.config) as vnc:
-                # Basic connection info
-                self.assertGreater(vnc.rect.width, 0)
-                self.assertGreater(vnc.rect.height, 0)
-
-                rel_res = Point(vnc.rect.width, vnc.rect.height)
-
-                # Test screenshots (may need to wait for first frame)
-                full_screenshot = await vnc.capture()
-                self.assertEqual(len(full_screenshot.shape), 3)
-                self.assertEqual(full_screenshot.shape[2], 4)  # RGBA
-                self.assertEqual(full_screenshot.shape[0], vnc.rect.height)
-                self.assertEqual(full_screenshot.shape[1], vnc.rect.width)
-
-                # Test region capture
-                region = Rect(0, 0, min(200, vnc.rect.width), min(150, vnc.rect.height))
-                region_screenshot = await vnc.capture(region)
-                self.assertEqual(region_screenshot.shape[0], region.height)
-                self.assertEqual(region_screenshot.shape[1], region.width)
-
-                # Test relative coordinate capture
-                rel_region = Rect(
-                    rel_res.x // 4, rel_res.y // 4, rel_res.x // 4, rel_res.y // 4
-                )
-                rel_screenshot = await vnc.capture(rel_region)
-                self.assertEqual(len(rel_screenshot.shape), 3)
-                self.assertEqual(rel_screenshot.shape[2], 4)  # RGBA
-
-                # Test mouse operations with float-derived coordinates
-                center_x = 100.0
-                center_y = 100.0
-
-                await vnc.move(Point(int(center_x), int(center_y)))
-                await vnc.click(MOUSE_BUTTON_LEFT)
-                await vnc.click(MOUSE_BUTTON_MIDDLE)
-                await vnc.click(MOUSE_BUTTON_RIGHT)
-                await vnc.double_click(MOUSE_BUTTON_LEFT)
-
-                # Test scrolling
-                await vnc.scroll_up(3)
-                await vnc.scroll_down(2)
-
-                # Test click_at helpers
-                corner_x = 100.0
-                corner_y = 100.0
-                await vnc.click_at(
-                    Point(int(corner_x), int(corner_y)), MOUSE_BUTTON_LEFT
-                )
-                await vnc.double_click_at(
-                    Point(int(corner_x * 2), int(corner_y * 2)), MOUSE_BUTTON_LEFT
-                )
-
-                # Test drag operations with all mouse buttons
-                start_x = 100.0
-                start_y = 100.0
-                end_x = 300
-                end_y = 300
-
-                # Left button drag
-                await vnc.move(Point(int(start_x), int(start_y)))
-                async with vnc.hold_mouse(MOUSE_BUTTON_LEFT):
-                    await vnc.move(Point(int(end_x), int(end_y)))
+            vnc = self.vnc
+            width, height = vnc.rect.width, vnc.rect.height
+            rel_region = Rect(width // 4, height // 4, width // 4, height // 4)
+            rel_screenshot = await vnc.capture(rel_region)
+            self.assertEqual(
+                rel_screenshot.shape, (rel_region.height, rel_region.width, 4)
+            )
+            self.assertEqual(rel_screenshot.dtype, np.uint8)
+            self.assertTrue(rel_screenshot.flags["C_CONTIGUOUS"])
 
-                # Middle button drag
-                await vnc.move(Point(int(start_x * 1.1), int(start_y * 1.1)))
-                async with vnc.hold_mouse(MOUSE_BUTTON_MIDDLE):
-                    await vnc.move(Point(int(end_x * 0.9), int(end_y * 0.9)))
+        self.loop.run_until_complete(run_test())
 
-                # Right button drag
-                await vnc.move(Point(int(start_x * 1.2), int(start_y * 1.2)))
-                async with vnc.hold_mouse(MOUSE_BUTTON_RIGHT):
-                    await vnc.move(Point(int(end_x * 0.8), int(end_y * 0.8)))
+    def test_mouse_clicks(self):
+        """Test clicking every button, scrolling and the click_at helpers."""
 
-                # Test keyboard operations
-                await vnc.write("Hello pyvnc!")
-                await vnc.press("Return")
+        async def run_test():
+            vnc = self.vnc
+            center = Point(100, 100)
+            corner = Point(100, 100)
+
+            await vnc.move(center)
+            for button in (
+                MOUSE_BUTTON_LEFT,
+                MOUSE_BUTTON_MIDDLE,
+                MOUSE_BUTTON_RIGHT,
+            ):
+                with self.subTest(click=button):
+                    await vnc.click(button)
+            await vnc.double_click(MOUSE_BUTTON_LEFT)
+
+            # Test scrolling
+            await vnc.scroll_up(3)
+            await vnc.scroll_down(2)
+
+            # Test click_at helpers
+            await vnc.click_at(corner, MOUSE_BUTTON_LEFT)
+            await vnc.double_click_at(
+                Point(corner.x * 2, corner.y * 2), MOUSE_BUTTON_LEFT
+            )
+
+        self.loop.run_until_complete(run_test())
 
-                async with vnc.hold_key("Ctrl"):
-                    await vnc.press("a")  # Select all
+    def test_mouse_drags(self):
+        """Test dragging with every mouse button."""
 
-                async with vnc.hold_key("Shift"):
-                    await vnc.press("a")
+        async def run_test():
+            vnc = self.vnc
+            start = Point(100, 100)
+            end = Point(300, 300)
+
+            # Scaled in tenths so every coordinate stays an integer
+            for button, start_tenths, end_tenths in (
+                (MOUSE_BUTTON_LEFT, 10, 10),
+                (MOUSE_BUTTON_MIDDLE, 11, 9),
+                (MOUSE_BUTTON_RIGHT, 12, 8),
+            ):
+                with self.subTest(drag=button):
+                    await vnc.move(
+                        Point(
+                            start.x * start_tenths // 10,
+                            start.y * start_tenths // 10,
+                        )
+                    )
+                    async with vnc.hold_mouse(button):
+                        await vnc.move(
+                            Point(end.x * end_tenths // 10, end.y * end_tenths // 10)
+                        )
+
+        self.loop.run_until_complete(run_test())
+
+    def test_keyboard(self):
+        """Test typing text, pressing keys and holding modifiers."""
 
-        asyncio.run(run_test())
+        async def run_test():
+            vnc = self.vnc
+            await vnc.write("Hello pyvnc!")
+            await vnc.press("Return")
 
-    def test_png_output(self):
-        """Test RGBA screenshot with PIL PNG output."""
+            async with vnc.hold_key("Ctrl"):
+                await vnc.press("a")  # Select all
+
+            async with vnc.hold_key("Shift"):
+                await vnc.press("a")
+
+        self.loop.run_until_complete(run_test())
+
+    def test_batched_input(self):
+        """Test that a mixed input sequence inside batch() is sent and flushed by capture."""
 
         async def run_test():
-            try:
-                from PIL import Image
+            vnc = self.vnc
+            async with vnc.batch():
+                await vnc.click_at(Point(10, 10), MOUSE_BUTTON_LEFT)
+                async with vnc.hold_mouse(MOUSE_BUTTON_LEFT):
+                    await vnc.move(Point(20, 20))
+                await vnc.write("batched")
+                # A capture inside the block sends the queued input ahead of its request
+                screenshot = await vnc.capture(Rect(0, 0, 16, 16))
+                self.assertEqual(screenshot.shape, (16, 16, 4))
+                await vnc.press("Return")
 
-                async with await VNCClient.connect(self.config) as vnc:
-                    screenshot = await vnc.capture()
+        self.loop.run_until_complete(run_test())
 
-                    # Convert to PIL Image and save as PNG
-                    image = Image.fromarray(screenshot, "RGBA")
-                    png_path = os.path.join(self.temp_dir, "test_screenshot.png")
+    @unittest.skipUnless(HAS_PIL, "PIL/Pillow not available for PNG testing")
+    def test_png_output(self):
+        """Test RGBA screenshot with PIL PNG output."""
 
-                    # Also save to project root with timestamp for verification
-                    import time
+        from PIL import Image
 
-                    timestamp = int(time.time())
-                    project_png = f"test_screenshot_{timestamp}.png"
-                    image.save(png_path, "PNG")
-                    image.save(project_png, "PNG")
+        async def run_test():
+            vnc = self.vnc
+            screenshot = await vnc.capture()
 
-                    # Verify file was created
-                    self.assertTrue(os.path.exists(png_path))
-                    file_size = os.path.getsize(png_path)
-                    self.assertGreater(file_size, 1000)  # Should be reasonably sized
+            # Convert to PIL Image
+            image = Image.fromarray(screenshot, "RGBA")
+            self.assertEqual(image.mode, "RGBA")
+            self.assertEqual(image.size, (screenshot.shape[1], screenshot.shape[0]))
 
-            except ImportError:
-                self.skipTest("PIL/Pillow not available for PNG testing")
+            # PNG encoding only exercises Pillow, so it is opt-in
+            if os.getenv("PYVNC_TEST_PNG") == "1":
+                buffer = io.BytesIO()
+                # Fastest DEFLATE level; only the encoded size is checked
+                image.save(buffer, "PNG", compress_level=1)
+                # Should be reasonably sized
+                self.assertGreater(buffer.tell(), 1000)
 
-        asyncio.run(run_test())
+        self.loop.run_until_complete(run_test())
 
     def test_point_like_rect_like_usage(self):
         """Test using PointLike and RectLike objects."""
@@ -316,37 +402,48 @@ class TestVNCIntegration(unittest.TestCase):
                 return Rect(10, 10, 100, 100)
 
         async def run_test():
-            async with await VNCClient.connect(self.config) as vnc:
-                # Test moving to PointLike object
-                test_point = TestPoint()
-                await vnc.move(test_point)
+            vnc = self.vnc
+            # Test moving to PointLike object
+            test_point = TestPoint()
+            await vnc.move(test_point)
 
-                # Test capturing RectLike region
-                test_rect = TestRect()
-                region_screenshot = await vnc.capture(test_rect)
-                self.assertEqual(len(region_screenshot.shape), 3)
+            # Test capturing RectLike region
+            test_rect = TestRect()
+            region_screenshot = await vnc.capture(test_rect)
+            self.assertEqual(region_screenshot.shape, (100, 100, 4))
 
-        asyncio.run(run_test())
+        self.loop.run_until_complete(run_test())
 
 
 class TestErrorHandling(unittest.TestCase):
     """Test error handling scenarios."""
 
+    @classmethod
+    def setUpClass(cls):
+        """Create one event loop shared by every test in the class."""
+        cls.loop = asyncio.new_event_loop()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Close the shared event loop."""
+        cls.loop.close()
+
     def test_invalid_connection(self):
         """Test connection to non-existent server."""
 
         async def run_test():
+            # Nothing listens on port 1, so the connection is refused at once
             bad_config = VNCConfig(
-                host="nonexistent.example.com", port=9999, connection_timeout=1.0
+                host="127.0.0.1", port=1, connection_timeout=1.0, max_retries=1
             )
             with self.assertRaises(Exception):
                 await VNCClient.connect(bad_config)
 
-        asyncio.run(run_test())
+        self.loop.run_until_complete(run_test())
 
     def test_invalid_key_code(self):
         """Test invalid key code handling."""
-        config = load_test_config()
+        config = TEST_CONFIG
         if config is None:
             self.skipTest("VNC_PASSWORD not configured")
 
@@ -358,7 +455,7 @@ class TestErrorHandling(unittest.TestCase):
             except Exception:
                 pass  # Connection might fail, that's ok for this test
 
-        asyncio.run(run_test())
+        self.loop.run_until_complete(run_test())
 
 
 def main():
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""Tests for framebuffer allocation and update decoding."""
+
+import unittest
+import asyncio
+import zlib
+from unittest.mock import patch
+
+import numpy as np
+
+from pyvnc import VNCClient, VNCConfig, Rect
+from pyvnc.pyvnc_async import _read_bytes
+from pyvnc.pyvnc_kernels import (
+    HAVE_NUMBA,
+    _blit_rgb_numpy,
+    _decode_zrle_numpy,
+    blit_rgb,
+    decode_zrle,
+)
+
+
+def run_length(length: int) -> bytes:
+    """Encode a ZRLE run length."""
+    length -= 1
+    return b"\xff" * (length // 255) + bytes([length % 255])
+
+
+class TestFramebuffer(unittest.IsolatedAsyncioTestCase):
+    """Test persistent framebuffer allocation and update decoding."""
+
+    def test_framebuffer_reused_until_resize(self):
+        """Test that the framebuffer is only reallocated when the screen size changes."""
+        client = VNCClient(VNCConfig())
+        client.rect = Rect(0, 0, 64, 48)
+
+        pixels = client._ensure_framebuffer()
+        self.assertEqual(pixels.shape, (48, 64, 4))
+        self.assertTrue((pixels[:, :, 3] == 255).all())
+        self.assertIs(client._ensure_framebuffer(), pixels)
+
+        client.rect = Rect(0, 0, 32, 24)
+        resized = client._ensure_framebuffer()
+        self.assertIsNot(resized, pixels)
+        self.assertEqual(resized.shape, (24, 32, 4))
+
+    async def test_raw_update_is_converted_to_rgba(self):
+        """Test that a RAW rectangle in BGRX order lands in the framebuffer as RGBA."""
+        client = VNCClient(VNCConfig())
+        client.rect = Rect(0, 0, 4, 3)
+        client._reader = asyncio.StreamReader()
+
+        # padding, 1 rectangle at (1, 1) sized 2x2, RAW encoding, BGRX pixels
+        client._reader.feed_data(
+            b"\x00\x00\x01"
+            + b"\x00\x01\x00\x01\x00\x02\x00\x02\x00\x00\x00\x00"
+            + b"\x30\x20\x10\x00" * 4
+        )
+        await client._handle_framebuffer_update()
+
+        pixels = client._pixels_rgba
+        self.assertEqual(pixels[1, 1].tolist(), [0x10, 0x20, 0x30, 255])
+        self.assertEqual(pixels[2, 2].tolist(), [0x10, 0x20, 0x30, 255])
+        self.assertEqual(pixels[0, 0].tolist(), [0, 0, 0, 255])
+        self.assertTrue(client._capture_event.is_set())
+
+    async def test_zlib_updates_share_one_stream(self):
+        """Test that consecutive ZLIB rectangles are inflated from one zlib stream."""
+        client = VNCClient(VNCConfig())
+        client.rect = Rect(0, 0, 2, 2)
+        client._reader = asyncio.StreamReader()
+        compressor = zlib.compressobj()
+
+        for colour in (b"\x03\x02\x01\x00", b"\x06\x05\x04\x00"):
+            compressed = compressor.compress(colour * 4)
+            compressed += compressor.flush(zlib.Z_SYNC_FLUSH)
+            client._reader.feed_data(
+                b"\x00\x00\x01"
+                + b"\x00\x00\x00\x00\x00\x02\x00\x02\x00\x00\x00\x06"
+                + len(compressed).to_bytes(4, "big")
+                + compressed
+            )
+            await client._handle_framebuffer_update()
+
+        self.assertEqual(client._pixels_rgba[1, 1].tolist(), [4, 5, 6, 255])
+
+    async def test_zlib_update_arriving_in_pieces(self):
+        """Test that a ZLIB rectangle split across socket reads is reassembled."""
+        client = VNCClient(VNCConfig())
+        client.rect = Rect(0, 0, 16, 16)
+        client._reader = asyncio.StreamReader()
+
+        expected = np.random.default_rng(0).integers(0, 256, (16, 16, 4), np.uint8)
+        compressed = zlib.compress(expected.tobytes(), 0)
+        message = (
+            b"\x00\x00\x01"
+            + b"\x00\x00\x00\x00\x00\x10\x00\x10\x00\x00\x00\x06"
+            + len(compressed).to_bytes(4, "big")
+            + compressed
+        )
+
+        async def feed():
+            for start in range(0, len(message), 100):
+                client._reader.feed_data(message[start : start + 100])
+                await asyncio.sleep(0)
+
+        feeder = asyncio.create_task(feed())
+        await client._handle_framebuffer_update()
+        await feeder
+
+        pixels = client._pixels_rgba
+        self.assertEqual(pixels[:, :, 0].tolist(), expected[:, :, 2].tolist())
+        self.assertEqual(pixels[:, :, 2].tolist(), expected[:, :, 0].tolist())
+
+    async def test_zrle_and_copyrect_updates(self):
+        """Test a ZRLE rectangle followed by a CopyRect of part of it."""
+        client = VNCClient(VNCConfig())
+        client.rect = Rect(0, 0, 4, 4)
+        client._reader = asyncio.StreamReader()
+
+        compressed = zlib.compress(b"\x01\x30\x20\x10")
+        client._reader.feed_data(
+            b"\x00\x00\x02"
+            + b"\x00\x00\x00\x00\x00\x02\x00\x02\x00\x00\x00\x10"
+            + len(compressed).to_bytes(4, "big")
+            + compressed
+            + b"\x00\x02\x00\x02\x00\x02\x00\x01\x00\x00\x00\x01"
+            + b"\x00\x00\x00\x01"
+        )
+        await client._handle_framebuffer_update()
+
+        pixels = client._pixels_rgba
+        self.assertEqual(pixels[1, 1].tolist(), [0x10, 0x20, 0x30, 255])
+        self.assertEqual(pixels[2, 3].tolist(), [0x10, 0x20, 0x30, 255])
+        self.assertEqual(pixels[3, 3].tolist(), [0, 0, 0, 255])
+
+    async def test_rectangle_outside_framebuffer_is_rejected(self):
+        """Test that a rectangle overhanging the screen raises before anything is written."""
+        # A 300x300 rectangle at (2, 2) on a 4x4 screen, for each encoding
+        header = b"\x00\x02\x00\x02\x01\x2c\x01\x2c"
+        cases = {
+            "RAW": header + b"\x00\x00\x00\x00",
+            "ZLIB": header + b"\x00\x00\x00\x06",
+            "ZRLE": header + b"\x00\x00\x00\x10",
+            "CopyRect source": b"\x00\x00\x00\x00\x00\x02\x00\x02\x00\x00\x00\x01"
+            + b"\x00\x03\x00\x03",
+        }
+        for name, rect in cases.items():
+            with self.subTest(name):
+                client = VNCClient(VNCConfig())
+                client.rect = Rect(0, 0, 4, 4)
+                client._reader = asyncio.StreamReader()
+                client._reader.feed_data(b"\x00\x00\x01" + rect)
+                with self.assertRaises(ValueError):
+                    await client._handle_framebuffer_update()
+                self.assertTrue((client._pixels_rgba[:, :, :3] == 0).all())
+
+
+class TestZRLE(unittest.TestCase):
+    """Test ZRLE tile decoding for every subencoding."""
+
+    RED = b"\x00\x00\xff"
+    GREEN = b"\x00\xff\x00"
+    BLUE = b"\xff\x00\x00"
+
+    decode_zrle = staticmethod(decode_zrle)
+
+    def decode(self, data: bytes, width: int, height: int) -> np.ndarray:
+        return self.decode_zrle(data, width, height, 0)[:, :, :3]
+
+    def test_raw_tile(self):
+        """Test subencoding 0 (raw CPIXELs)."""
+        pixels = self.decode(b"\x00" + bytes(range(12)), 2, 2)
+        self.assertEqual(pixels.reshape(-1).tolist(), list(range(12)))
+
+    def test_solid_tiles(self):
+        """Test subencoding 1 across a rectangle wider than one tile."""
+        pixels = self.decode(b"\x01" + self.RED + b"\x01" + self.BLUE, 70, 3)
+        self.assertEqual(pixels[:, :64].tolist(), [[list(self.RED)] * 64] * 3)
+        self.assertEqual(pixels[:, 64:].tolist(), [[list(self.BLUE)] * 6] * 3)
+
+    def test_packed_palette_tiles(self):
+        """Test subencodings 2-16 with 1, 2 and 4 bit indices."""
+        palette = self.RED + self.GREEN + self.BLUE + self.RED + self.GREEN
+        cases = (
+            (b"\x02" + palette[:6] + b"\x40\x80", [[0, 1, 0], [1, 0, 0]]),
+            (b"\x03" + palette[:9] + b"\x24\x80", [[0, 2, 1], [2, 0, 0]]),
+            (b"\x05" + palette + b"\x42\x00\x10\x00", [[4, 2, 0], [1, 0, 0]]),
+        )
+        colours = np.frombuffer(palette, np.uint8).reshape(-1, 3)
+        for data, indices in cases:
+            with self.subTest(palette_size=data[0]):
+                pixels = self.decode(data, 3, 2)
+                np.testing.assert_array_equal(pixels, colours[indices])
+
+    def test_plain_rle_tile(self):
+        """Test subencoding 128 including a run longer than 255 pixels."""
+        data = b"\x80" + self.RED + run_length(300) + self.BLUE + run_length(100)
+        pixels = self.decode(data, 20, 20).reshape(-1, 3)
+        self.assertTrue((pixels[:300] == list(self.RED)).all())
+        self.assertTrue((pixels[300:] == list(self.BLUE)).all())
+
+    def test_palette_rle_tile(self):
+        """Test subencodings 130-255 mixing single pixels and runs."""
+        data = b"\x82" + self.RED + self.GREEN + b"\x01" + b"\x80" + run_length(7)
+        pixels = self.decode(data, 4, 2).reshape(-1, 3)
+        self.assertEqual(pixels[0].tolist(), list(self.GREEN))
+        self.assertTrue((pixels[1:] == list(self.RED)).all())
+
+    def test_cpixel_offset(self):
+        """Test that CPIXELs can be placed in the upper three bytes."""
+        pixels = self.decode_zrle(b"\x01\x01\x02\x03", 1, 1, 1)
+        self.assertEqual(pixels[0, 0].tolist(), [0, 1, 2, 3])
+
+    def test_invalid_subencoding(self):
+        """Test that reserved subencodings are rejected."""
+        with self.assertRaises(ValueError):
+            self.decode_zrle(b"\x11", 1, 1, 0)
+
+    def test_truncated_tile(self):
+        """Test that a tile cut short is rejected rather than read past the end."""
+        with self.assertRaises(ValueError):
+            self.decode_zrle(b"\x00" + bytes(11), 2, 2, 0)
+
+    def test_malformed_tiles(self):
+        """Test that truncated or inconsistent tiles of every kind raise ValueError."""
+        red, green = self.RED, self.GREEN
+        cases = {
+            "missing tile": b"",
+            "solid colour": b"\x01\x00\x00",
+            "packed indices": b"\x02" + red + green + b"\x00",
+            "packed index": b"\x03" + red + green + red + b"\xc0\x00",
+            "plain colour": b"\x80\x00\x00",
+            "plain run length": b"\x80" + red,
+            "plain overflow": b"\x80" + red + run_length(5),
+            "palette": b"\x82" + red,
+            "palette indices": b"\x82" + red + green + b"\x00",
+            "palette index": b"\x82" + red + green + b"\x02",
+            "palette overflow": b"\x82" + red + green + b"\x80" + run_length(5),
+        }
+        for name, data in cases.items():
+            with self.subTest(name), self.assertRaises(ValueError):
+                self.decode_zrle(data, 2, 2, 0)
+
+
+class TestZRLENumPy(TestZRLE):
+    """Run the ZRLE tests against the NumPy fallback decoder."""
+
+    decode_zrle = staticmethod(_decode_zrle_numpy)
+
+
+class TestReadBytes(unittest.IsolatedAsyncioTestCase):
+    """Test reading fixed-size payloads from a stream."""
+
+    async def test_read_bytes_reassembles_chunks(self):
+        """Test that a payload split across several chunks is returned whole."""
+        reader = asyncio.StreamReader(limit=4)
+        payload = bytes(range(256)) * 4
+
+        async def feed():
+            for start in range(0, len(payload), 100):
+                reader.feed_data(payload[start : start + 100])
+                await asyncio.sleep(0)
+
+        feeder = asyncio.create_task(feed())
+        self.assertEqual(await _read_bytes(reader, len(payload)), payload)
+        await feeder
+
+    async def test_read_bytes_raises_on_eof(self):
+        """Test that a short stream raises ConnectionError."""
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"abc")
+        reader.feed_eof()
+        with self.assertRaises(ConnectionError):
+            await _read_bytes(reader, 8)
+
+
+class TestKernels(unittest.TestCase):
+    """Test the pixel kernels against their NumPy reference implementations."""
+
+    def test_blit_rgb_reorders_channels(self):
+        """Test that blit_rgb swaps BGRX into RGB without touching alpha."""
+        src = np.arange(6 * 5 * 4, dtype=np.uint8).reshape(6, 5, 4)
+        dst = np.full((8, 8, 4), 255, np.uint8)
+        expected = dst.copy()
+
+        blit_rgb(dst[1:7, 2:7], src, 2, 1, 0)
+        _blit_rgb_numpy(expected[1:7, 2:7], src, 2, 1, 0)
+
+        np.testing.assert_array_equal(dst, expected)
+        np.testing.assert_array_equal(dst[1:7, 2:7, 0], src[:, :, 2])
+        self.assertTrue((dst[:, :, 3] == 255).all())
+
+    def test_blit_rgb_in_order_keeps_alpha_opaque(self):
+        """Test that RGBX sources are copied as-is with alpha forced to 255."""
+        src = np.arange(3 * 2 * 4, dtype=np.uint8).reshape(3, 2, 4)
+        for blit in (blit_rgb, _blit_rgb_numpy):
+            with self.subTest(blit=blit):
+                dst = np.full((4, 4, 4), 255, np.uint8)
+                blit(dst[1:4, 1:3], src, 0, 1, 2)
+                np.testing.assert_array_equal(dst[1:4, 1:3, :3], src[:, :, :3])
+                self.assertTrue((dst[:, :, 3] == 255).all())
+
+    def test_blit_rgb_rejects_mismatched_shapes(self):
+        """Test that a source larger than the destination area raises instead of overrunning it."""
+        dst = np.zeros((4, 4, 4), np.uint8)
+        src = np.zeros((3, 5, 4), np.uint8)
+        for indices in ((0, 1, 2), (2, 1, 0)):
+            with self.subTest(indices=indices), self.assertRaises(ValueError):
+                blit_rgb(dst[1:4, 1:4], src, *indices)
+
+    @unittest.skipUnless(HAVE_NUMBA, "numba not installed")
+    def test_blit_rgb_dispatch(self):
+        """Test that only reordering uses the Numba kernel; in-order pixels use the 32-bit OR."""
+        dst = np.zeros((2, 2, 4), np.uint8)
+        src = np.zeros((2, 2, 4), np.uint8)
+        with patch("pyvnc.pyvnc_kernels._blit_rgb_numba") as numba_blit:
+            blit_rgb(dst, src, 0, 1, 2)
+            numba_blit.assert_not_called()
+            blit_rgb(dst, src, 2, 1, 0)
+            numba_blit.assert_called_once_with(dst, src, 2, 1, 0)
+
+
+def main():
+    """Run all decoding tests."""
+    print("Running pyvnc decoding tests...")
+    print("=" * 50)
+
+    unittest.main(verbosity=2, exit=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""Tests for the RFB handshake against an in-process fake VNC server."""
+
+import asyncio
+import unittest
+
+from cryptography.hazmat.primitives.ciphers import Cipher
+from cryptography.hazmat.primitives.ciphers.modes import ECB
+
+try:
+    from cryptography.hazmat.decrepit.ciphers.algorithms import TripleDES
+except ImportError:
+    from cryptography.hazmat.primitives.ciphers.algorithms import TripleDES
+
+from pyvnc import VNCClient, VNCConfig, Rect
+from pyvnc.pyvnc_common import ENCODING_ZLIB, PIXEL_FORMATS
+
+CHALLENGE = bytes(range(16))
+
+
+def vnc_auth_response(password: str, challenge: bytes) -> bytes:
+    """Reference VNC authentication response, computed independently of pyvnc."""
+    key = password.encode("latin-1")[:8].ljust(8, b"\x00")
+    key = bytes(int(bin(n)[2:].zfill(8)[::-1], 2) for n in key)
+    encryptor = Cipher(TripleDES(key), ECB()).encryptor()
+    return encryptor.update(challenge) + encryptor.finalize()
+
+
+class FakeVNCServer:
+    """A minimal RFB 3.8 server that performs the handshake and records requests."""
+
+    def __init__(self, auth_types: bytes, password: str = "secret"):
+        self.auth_types = auth_types
+        self.password = password
+        self.auth_response = b""
+        self.client_messages = b""
+        self.server = None
+
+    async def __aenter__(self) -> "FakeVNCServer":
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+    @property
+    def port(self) -> int:
+        return self.server.sockets[0].getsockname()[1]
+
+    async def handle(self, reader, writer) -> None:
+        writer.write(b"RFB 003.008\n")
+        await reader.readexactly(12)
+        writer.write(bytes([len(self.auth_types)]) + self.auth_types)
+        auth_type = (await reader.readexactly(1))[0]
+        if auth_type == 2:
+            writer.write(CHALLENGE)
+            self.auth_response = await reader.readexactly(16)
+            ok = self.auth_response == vnc_auth_response(self.password, CHALLENGE)
+            writer.write(b"\x00\x00\x00\x00" if ok else b"\x00\x00\x00\x01")
+            if not ok:
+                writer.close()
+                return
+        else:
+            writer.write(b"\x00\x00\x00\x00")
+        await reader.readexactly(1)  # shared flag
+        name = b"fake"
+        writer.write(
+            b"\x01\x40\x00\xf0"
+            + PIXEL_FORMATS["bgra"].serialize()
+            + len(name).to_bytes(4, "big")
+            + name
+        )
+        await writer.drain()
+        try:
+            while True:
+                chunk = await reader.read(1024)
+                if not chunk:
+                    break
+                self.client_messages += chunk
+        finally:
+            writer.close()
+
+
+class TestHandshake(unittest.IsolatedAsyncioTestCase):
+    """Test _perform_handshake against the fake server."""
+
+    async def handshake(self, server: FakeVNCServer, password=None) -> VNCClient:
+        client = VNCClient(
+            VNCConfig(host="127.0.0.1", port=server.port, password=password)
+        )
+        self.addAsyncCleanup(client._cleanup_connection)
+        await client._perform_handshake()
+        return client
+
+    async def test_vnc_auth(self):
+        """Test that VNC authentication answers the challenge correctly."""
+        async with FakeVNCServer(b"\x02") as server:
+            client = await self.handshake(server, password="secret")
+            self.assertEqual(
+                server.auth_response, vnc_auth_response("secret", CHALLENGE)
+            )
+            self.assertEqual(client.rect, Rect(0, 0, 320, 240))
+            self.assertEqual(client.desktop_name, "fake")
+
+    async def test_encodings_are_advertised(self):
+        """Test that SetEncodings is sent once the handshake completes."""
+        async with FakeVNCServer(b"\x01") as server:
+            await self.handshake(server)
+            for _ in range(100):
+                if server.client_messages:
+                    break
+                await asyncio.sleep(0.01)
+            self.assertEqual(server.client_messages[:2], b"\x02\x00")
+            count = int.from_bytes(server.client_messages[2:4], "big")
+            encodings = [
+                int.from_bytes(server.client_messages[4 + 4 * i : 8 + 4 * i], "big")
+                for i in range(count)
+            ]
+            self.assertIn(ENCODING_ZLIB, encodings)
+
+    async def test_vnc_auth_wrong_password(self):
+        """Test that a rejected password raises PermissionError."""
+        async with FakeVNCServer(b"\x02", password="other") as server:
+            with self.assertRaises(PermissionError):
+                await self.handshake(server, password="secret")
+
+    async def test_no_auth_preferred(self):
+        """Test that no authentication is chosen when the server offers it."""
+        async with FakeVNCServer(b"\x02\x01") as server:
+            client = await self.handshake(server)
+            self.assertEqual(server.auth_response, b"")
+            self.assertEqual(client.rect, Rect(0, 0, 320, 240))
+
+    async def test_unsupported_auth(self):
+        """Test that servers offering no supported auth types are rejected."""
+        async with FakeVNCServer(b"\x05") as server:
+            with self.assertRaises(ValueError):
+                await self.handshake(server)
+
+
+def main():
+    """Run all handshake tests."""
+    print("Running pyvnc handshake tests...")
+    print("=" * 50)
+
+    unittest.main(verbosity=2, exit=False)
+
+
+if __name__ == "__main__":
+    main()
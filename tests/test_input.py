@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""Tests for the keyboard and mouse messages sent to the server."""
+
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+
+from pyvnc import (
+    VNCClient,
+    VNCConfig,
+    Point,
+    Rect,
+    key_codes,
+    MOUSE_BUTTON_LEFT,
+    MOUSE_BUTTON_RIGHT,
+)
+
+
+def make_client() -> VNCClient:
+    """Create a client whose writer records everything sent to the server."""
+    client = VNCClient(VNCConfig(auto_reconnect=False))
+    client._writer = MagicMock()
+    client._writer.drain = AsyncMock()
+    client._connected = True
+    return client
+
+
+def sent(client: VNCClient) -> bytes:
+    """Return all bytes written to the client's writer so far."""
+    return b"".join(call.args[0] for call in client._writer.write.call_args_list)
+
+
+def key_event(key: str, down: bool) -> bytes:
+    return b"\x04" + bytes([down]) + b"\x00\x00" + key_codes[key].to_bytes(4, "big")
+
+
+class TestKeyboardMessages(unittest.IsolatedAsyncioTestCase):
+    """Test KeyEvent messages."""
+
+    async def test_press_sends_down_then_up(self):
+        """Test that press() sends a key-down and key-up message."""
+        client = make_client()
+        await client.press("a")
+        self.assertEqual(sent(client), key_event("a", True) + key_event("a", False))
+
+    async def test_press_combination_releases_in_reverse(self):
+        """Test that key combinations are released in reverse order."""
+        client = make_client()
+        await client.press("Ctrl", "c")
+        self.assertEqual(
+            sent(client),
+            key_event("Ctrl", True)
+            + key_event("c", True)
+            + key_event("c", False)
+            + key_event("Ctrl", False),
+        )
+
+    async def test_press_is_sent_in_one_message(self):
+        """Test that a key combination is sent in a single write."""
+        client = make_client()
+        await client.press("Ctrl", "Shift", "t")
+        self.assertEqual(client._writer.write.call_count, 1)
+
+    async def test_write_types_each_character(self):
+        """Test that write() presses and releases every character in order."""
+        client = make_client()
+        await client.write("hi!")
+        self.assertEqual(
+            sent(client),
+            b"".join(key_event(c, True) + key_event(c, False) for c in "hi!"),
+        )
+
+    async def test_write_is_sent_in_one_message(self):
+        """Test that write() sends the whole text in a single write."""
+        client = make_client()
+        await client.write("hello")
+        self.assertEqual(client._writer.write.call_count, 1)
+        client._writer.drain.assert_awaited_once()
+
+    async def test_write_unknown_character_sends_nothing(self):
+        """Test that write() validates every character before sending."""
+        client = make_client()
+        with self.assertRaises(KeyError):
+            await client.write("ok\x00")
+        client._writer.write.assert_not_called()
+
+    async def test_unknown_key_raises(self):
+        """Test that an unknown key name raises KeyError."""
+        client = make_client()
+        with self.assertRaises(KeyError):
+            await client.press("InvalidKeyName123")
+
+
+class TestMouseMessages(unittest.IsolatedAsyncioTestCase):
+    """Test PointerEvent messages."""
+
+    async def test_click_at(self):
+        """Test that click_at moves, presses and releases the button."""
+        client = make_client()
+        await client.click_at(Point(300, 2), MOUSE_BUTTON_LEFT)
+        self.assertEqual(
+            sent(client),
+            b"\x05\x00\x01\x2c\x00\x02"
+            + b"\x05\x01\x01\x2c\x00\x02"
+            + b"\x05\x00\x01\x2c\x00\x02",
+        )
+
+    async def test_move_to_current_position_is_skipped(self):
+        """Test that no PointerEvent is sent when the pointer state is unchanged."""
+        client = make_client()
+        await client.click_at(Point(10, 20))
+        await client.click_at(Point(10, 20))
+        await client.move(Point(10, 20))
+        self.assertEqual(
+            sent(client),
+            b"\x05\x00\x00\x0a\x00\x14"
+            + (b"\x05\x01\x00\x0a\x00\x14" + b"\x05\x00\x00\x0a\x00\x14") * 2,
+        )
+
+    async def test_scroll_is_sent_in_one_message(self):
+        """Test that repeated scrolling is sent as one batch of press/release pairs."""
+        client = make_client()
+        await client.scroll_down(repeat=3)
+        self.assertEqual(client._writer.write.call_count, 1)
+        self.assertEqual(
+            sent(client),
+            (b"\x05\x10\x00\x00\x00\x00" + b"\x05\x00\x00\x00\x00\x00") * 3,
+        )
+
+    async def test_click_while_dragging_keeps_other_buttons(self):
+        """Test that clicking inside hold_mouse leaves the held button pressed."""
+        client = make_client()
+        async with client.hold_mouse(MOUSE_BUTTON_LEFT):
+            await client.click(MOUSE_BUTTON_RIGHT)
+        self.assertEqual(
+            sent(client),
+            b"\x05\x01\x00\x00\x00\x00"
+            + b"\x05\x05\x00\x00\x00\x00"
+            + b"\x05\x01\x00\x00\x00\x00"
+            + b"\x05\x00\x00\x00\x00\x00",
+        )
+
+
+class TestBatchedInput(unittest.IsolatedAsyncioTestCase):
+    """Test that batch() coalesces input events."""
+
+    async def test_batch_sends_one_message_on_exit(self):
+        """Test that input inside batch() is held back and sent in one write."""
+        client = make_client()
+        async with client.batch():
+            await client.move(Point(1, 2))
+            await client.click()
+            async with client.batch():
+                await client.press("a")
+            client._writer.write.assert_not_called()
+        self.assertEqual(client._writer.write.call_count, 1)
+        self.assertEqual(
+            sent(client),
+            b"\x05\x00\x00\x01\x00\x02"
+            + b"\x05\x01\x00\x01\x00\x02"
+            + b"\x05\x00\x00\x01\x00\x02"
+            + key_event("a", True)
+            + key_event("a", False),
+        )
+
+    async def test_capture_flushes_batched_input(self):
+        """Test that a capture inside batch() sends queued input ahead of its request."""
+        client = make_client()
+        client.rect = Rect(0, 0, 640, 480)
+        client._ensure_framebuffer()
+        async with client.batch():
+            await client.press("a")
+            await client.capture(wait=False)
+        self.assertEqual(
+            sent(client),
+            key_event("a", True)
+            + key_event("a", False)
+            + b"\x03\x00\x00\x00\x00\x00\x02\x80\x01\xe0",
+        )
+
+    async def test_other_tasks_are_not_batched(self):
+        """Test that input from another task is sent at once, not joined to the batch."""
+        client = make_client()
+        async with client.batch():
+            await client.press("a")
+            await asyncio.create_task(client.press("b"))
+            self.assertEqual(sent(client), key_event("b", True) + key_event("b", False))
+        self.assertEqual(client._writer.write.call_count, 2)
+
+    async def test_failed_block_drops_queued_input(self):
+        """Test that a block that raises sends nothing and keeps its own exception."""
+        client = make_client()
+        with self.assertRaises(RuntimeError):
+            async with client.batch():
+                await client.press("a")
+                raise RuntimeError("stop")
+        client._writer.write.assert_not_called()
+
+    async def test_failed_block_still_releases_held_keys_and_buttons(self):
+        """Test that releases are sent when a block raises after a capture flushed the presses."""
+        client = make_client()
+        client.rect = Rect(0, 0, 640, 480)
+        client._ensure_framebuffer()
+        with self.assertRaises(RuntimeError):
+            async with client.batch():
+                async with client.hold_key("Shift"), client.hold_mouse():
+                    await client.capture(wait=False)
+                    raise RuntimeError("stop")
+        self.assertEqual(
+            sent(client),
+            key_event("Shift", True)
+            + b"\x05\x01\x00\x00\x00\x00"
+            + b"\x03\x00\x00\x00\x00\x00\x02\x80\x01\xe0"
+            + b"\x05\x00\x00\x00\x00\x00"
+            + key_event("Shift", False),
+        )
+
+    async def test_failed_flush_does_not_record_pointer(self):
+        """Test that a pointer move whose batch was never sent is sent again later."""
+        client = make_client()
+        client._writer.drain.side_effect = ConnectionResetError
+        with self.assertRaises(ConnectionError):
+            async with client.batch():
+                await client.move(Point(1, 2))
+
+        client._connected = True
+        client._writer.reset_mock()
+        client._writer.drain.side_effect = None
+        await client.move(Point(1, 2))
+        self.assertEqual(sent(client), b"\x05\x00\x00\x01\x00\x02")
+
+
+class TestFramebufferRequests(unittest.IsolatedAsyncioTestCase):
+    """Test FramebufferUpdateRequest messages sent by capture()."""
+
+    async def test_first_incremental_capture_is_full(self):
+        """Test that incremental requests start only once the framebuffer is seeded."""
+        client = make_client()
+        client.rect = Rect(0, 0, 640, 480)
+        client._ensure_framebuffer()
+
+        await client.capture(wait=False, incremental=True)
+        await client.capture(wait=False, incremental=True)
+        await client.capture(wait=False)
+
+        request = b"\x00\x00\x00\x00\x02\x80\x01\xe0"
+        self.assertEqual(
+            sent(client),
+            b"\x03\x00" + request + b"\x03\x01" + request + b"\x03\x00" + request,
+        )
+
+    async def test_region_capture_is_contiguous_copy(self):
+        """Test that a region capture is a packed uint8 copy, not a framebuffer view."""
+        client = make_client()
+        client.rect = Rect(0, 0, 64, 48)
+        pixels = client._ensure_framebuffer()
+
+        area = await client.capture(Rect(8, 4, 16, 12), wait=False)
+        self.assertEqual(area.shape, (12, 16, 4))
+        self.assertEqual(area.dtype, np.uint8)
+        self.assertTrue(area.flags["C_CONTIGUOUS"])
+        self.assertFalse(np.shares_memory(area, pixels))
+
+
+def main():
+    """Run all input tests."""
+    print("Running pyvnc input tests...")
+    print("=" * 50)
+
+    unittest.main(verbosity=2, exit=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,13 +11,23 @@ from pyvnc import VNCClient, VNCConfig, Point, Rect
 class TestRetryLogic(unittest.TestCase):
     """Test connection retry logic."""
 
+    @classmethod
+    def setUpClass(cls):
+        """Create one event loop shared by every test in the class."""
+        cls.loop = asyncio.new_event_loop()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Close the shared event loop."""
+        cls.loop.close()
+
     def test_connection_retries_exhausted(self):
         """Test that ConnectionError is raised after max_retries exhausted."""
 
         async def run_test():
             config = VNCConfig(
-                host="invalid.host.example.com",
-                port=9999,
+                host="127.0.0.1",
+                port=1,
                 connection_timeout=0.1,
                 max_retries=2,
                 retry_delay=0.01,
@@ -30,15 +40,15 @@ class TestRetryLogic(unittest.TestCase):
             self.assertIn("Failed to connect", str(ctx.exception))
             self.assertIn("after 2 attempts", str(ctx.exception))
 
-        asyncio.run(run_test())
+        self.loop.run_until_complete(run_test())
 
     def test_retry_backoff_increases_delay(self):
         """Test that retry delay increases with backoff."""
 
         async def run_test():
             config = VNCConfig(
-                host="invalid.host.example.com",
-                port=9999,
+                host="127.0.0.1",
+                port=1,
                 connection_timeout=0.1,
                 max_retries=3,
                 retry_delay=0.01,
@@ -55,7 +65,7 @@ class TestRetryLogic(unittest.TestCase):
             # Should have at least 0.01 + 0.02 = 0.03 seconds of delays
             self.assertGreater(elapsed, 0.02)
 
-        asyncio.run(run_test())
+        self.loop.run_until_complete(run_test())
 
 
 class TestReconnectionLogic(unittest.IsolatedAsyncioTestCase):
@@ -250,8 +260,9 @@ class TestConnectionLifecycle(unittest.IsolatedAsyncioTestCase):
 
         await client.close()
 
-        # Should disable auto_reconnect
-        self.assertFalse(config.auto_reconnect)
+        # Should disable auto_reconnect on the client, leaving the config alone
+        self.assertFalse(client._auto_reconnect)
+        self.assertTrue(config.auto_reconnect)
         # Should stop running
         self.assertFalse(client._running)
         # Should disconnect
@@ -8,6 +8,8 @@ import asyncio
 import unittest
 import os
 
+import numpy as np
+
 try:
     from dotenv import load_dotenv
 
@@ -37,13 +39,26 @@ def load_test_config() -> VNCConfig:
     )
 
 
-@unittest.skipIf(load_test_config() is None, "VNC_PASSWORD not configured")
+# Read once at import; the skip decorators and every test share it
+TEST_CONFIG = load_test_config()
+
+
+@unittest.skipIf(TEST_CONFIG is None, "VNC_PASSWORD not configured")
 class TestRefactoredVNCClient(unittest.TestCase):
     """Tests for refactored VNC client with background task."""
 
-    def setUp(self):
-        """Set up test configuration."""
-        self.config = load_test_config()
+    @classmethod
+    def setUpClass(cls):
+        """Connect once and share the connection and its event loop across tests."""
+        cls.config = TEST_CONFIG
+        cls.loop = asyncio.new_event_loop()
+        cls.vnc = cls.loop.run_until_complete(VNCClient.connect(cls.config))
+
+    @classmethod
+    def tearDownClass(cls):
+        """Close the shared connection."""
+        cls.loop.run_until_complete(cls.vnc.close())
+        cls.loop.close()
 
     def test_background_task_running(self):
         """Test that background task is running during connection."""
@@ -58,119 +73,131 @@ class TestRefactoredVNCClient(unittest.TestCase):
                 await vnc.close()
             self.assertFalse(vnc._running)
 
-        asyncio.run(run_test())
+        self.loop.run_until_complete(run_test())
 
     def test_capture_full_screen(self):
         """Test capturing full screen with background task."""
 
         async def run_test():
-            async with await VNCClient.connect(self.config) as vnc:
-                screenshot = await vnc.capture()
-                self.assertEqual(len(screenshot.shape), 3)
-                self.assertEqual(screenshot.shape[2], 4)  # RGBA
-                self.assertEqual(screenshot.shape[0], vnc.rect.height)
-                self.assertEqual(screenshot.shape[1], vnc.rect.width)
+            vnc = self.vnc
+            screenshot = await vnc.capture()
+            self.assertEqual(screenshot.shape, (vnc.rect.height, vnc.rect.width, 4))
 
-        asyncio.run(run_test())
+        self.loop.run_until_complete(run_test())
 
     def test_capture_region(self):
         """Test capturing a specific region."""
 
         async def run_test():
-            async with await VNCClient.connect(self.config) as vnc:
-                region = Rect(0, 0, 100, 100)
-                screenshot = await vnc.capture(region)
-                self.assertEqual(screenshot.shape, (100, 100, 4))
+            vnc = self.vnc
+            region = Rect(0, 0, 100, 100)
+            screenshot = await vnc.capture(region)
+            self.assertEqual(screenshot.shape, (100, 100, 4))
+            # Captures are packed uint8 copies, ready for PIL without another copy
+            self.assertEqual(screenshot.dtype, np.uint8)
+            self.assertTrue(screenshot.flags["C_CONTIGUOUS"])
 
-        asyncio.run(run_test())
+        self.loop.run_until_complete(run_test())
 
     def test_capture_without_wait(self):
         """Test capture without waiting (returns immediately)."""
 
         async def run_test():
-            async with await VNCClient.connect(self.config) as vnc:
-                # Wait for first frame
-                await vnc.capture(wait=True)
-                # Now get current buffer without waiting
-                screenshot = await vnc.capture(wait=False)
-                self.assertEqual(screenshot.shape[2], 4)  # RGBA
+            vnc = self.vnc
+            probe = Rect(0, 0, 16, 16)
+            # Wait for first frame
+            await vnc.capture(probe, wait=True)
+            # Now get current buffer without waiting
+            screenshot = await vnc.capture(probe, wait=False)
+            self.assertEqual(screenshot.shape, (probe.height, probe.width, 4))
 
-        asyncio.run(run_test())
+        self.loop.run_until_complete(run_test())
 
     def test_mouse_operations(self):
         """Test mouse move and click operations."""
 
         async def run_test():
-            async with await VNCClient.connect(self.config) as vnc:
-                await vnc.move(Point(100, 100))
-                await vnc.click(MOUSE_BUTTON_LEFT)
+            vnc = self.vnc
+            await vnc.move(Point(100, 100))
+            await vnc.click(MOUSE_BUTTON_LEFT)
 
-        asyncio.run(run_test())
+        self.loop.run_until_complete(run_test())
 
     def test_mouse_drag_operations(self):
         """Test mouse drag operations."""
 
         async def run_test():
-            async with await VNCClient.connect(self.config) as vnc:
-                await vnc.move(Point(100, 100))
-                async with vnc.hold_mouse(MOUSE_BUTTON_LEFT):
-                    await vnc.move(Point(200, 200))
+            vnc = self.vnc
+            await vnc.move(Point(100, 100))
+            async with vnc.hold_mouse(MOUSE_BUTTON_LEFT):
+                await vnc.move(Point(200, 200))
 
-        asyncio.run(run_test())
+        self.loop.run_until_complete(run_test())
 
     def test_keyboard_operations(self):
         """Test keyboard write and press operations."""
 
         async def run_test():
-            async with await VNCClient.connect(self.config) as vnc:
-                await vnc.write("Hello")
-                await vnc.press("Return")
+            vnc = self.vnc
+            await vnc.write("Hello")
+            await vnc.press("Return")
 
-        asyncio.run(run_test())
+        self.loop.run_until_complete(run_test())
 
     def test_key_combinations(self):
         """Test key combinations with hold_key."""
 
         async def run_test():
-            async with await VNCClient.connect(self.config) as vnc:
-                async with vnc.hold_key("Ctrl"):
-                    await vnc.press("a")
+            vnc = self.vnc
+            async with vnc.hold_key("Ctrl"):
+                await vnc.press("a")
 
-        asyncio.run(run_test())
+        self.loop.run_until_complete(run_test())
 
     def test_click_at(self):
         """Test click_at helper method."""
 
         async def run_test():
-            async with await VNCClient.connect(self.config) as vnc:
-                await vnc.click_at(Point(150, 150), MOUSE_BUTTON_LEFT)
+            vnc = self.vnc
+            await vnc.click_at(Point(150, 150), MOUSE_BUTTON_LEFT)
 
-        asyncio.run(run_test())
+        self.loop.run_until_complete(run_test())
 
     def test_double_click_at(self):
         """Test double_click_at helper method."""
 
         async def run_test():
-            async with await VNCClient.connect(self.config) as vnc:
-                await vnc.double_click_at(Point(150, 150), MOUSE_BUTTON_LEFT)
+            vnc = self.vnc
+            await vnc.double_click_at(Point(150, 150), MOUSE_BUTTON_LEFT)
 
-        asyncio.run(run_test())
+        self.loop.run_until_complete(run_test())
 
 
 class TestErrorHandling(unittest.TestCase):
     """Test error handling scenarios."""
 
+    @classmethod
+    def setUpClass(cls):
+        """Create one event loop shared by every test in the class."""
+        cls.loop = asyncio.new_event_loop()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Close the shared event loop."""
+        cls.loop.close()
+
     def test_invalid_connection(self):
         """Test connection to non-existent server."""
 
         async def run_test():
+            # Nothing listens on port 1, so the connection is refused at once
             bad_config = VNCConfig(
-                host="nonexistent.example.com", port=9999, connection_timeout=1.0
+                host="127.0.0.1", port=1, connection_timeout=1.0, max_retries=1
             )
             with self.assertRaises(Exception):
                 await VNCClient.connect(bad_config)
 
-        asyncio.run(run_test())
+        self.loop.run_until_complete(run_test())
 
 
 def main():